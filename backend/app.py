@@ -1,137 +1,136 @@
-from flask import Flask, send_from_directory, request, jsonify
+import time
+STARTED_AT = time.time()
+
+from flask import Flask, Response, send_from_directory, request, jsonify, stream_with_context
 from flask_cors import CORS
 import sys
 import os
+import json
+import threading
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CITY_SIM_DIR = os.path.join(BASE_DIR, "city_sim")
 sys.path.append(CITY_SIM_DIR)
 
-from city_env import CityEnv
-from government_rl import train_advanced_rl
+from job_queue import JobQueue
 
 app = Flask(__name__, static_folder="build", static_url_path="")
 CORS(app)
 
+# Set once prewarm() has loaded the simulation stack
+prewarmed = threading.Event()
+
+
+def _simulation():
+    # gym, NumPy and the env load on the first simulation request (or in prewarm), so the
+    # static frontend and /health are served as soon as Flask is up. Training additionally
+    # imports torch, and only on a policy cache miss.
+    import simulation
+    return simulation
+
+# PPO rollout workers per training run (SubprocVecEnv when > 1)
+TRAIN_WORKERS = int(os.environ.get("TRAIN_WORKERS", min(os.cpu_count() or 1, 8)))
+
+# Background simulations: one process per concurrent job, bounded result retention
+jobs = JobQueue(
+    "simulation:run_job",
+    max_workers=int(os.environ.get("JOB_WORKERS", os.cpu_count() or 1)),
+    max_jobs=int(os.environ.get("JOB_MAX_RESULTS", 100)),
+    result_ttl=float(os.environ.get("JOB_RESULT_TTL", 3600)),
+)
+
 @app.route("/run_sim", methods=["POST"])
 def run_sim():
     data = request.get_json()
-    gov_mode = data.get("reward_mode", "basic_happiness")
-    episode_length = data.get("episode_length", 60)
-    training_steps = data.get("training_steps", 15000)
-    cost_of_living = data.get("household_cost_of_living", 7.0)
-    wage_min = data.get("household_wage_min", 13)
-    wage_max = data.get("household_wage_max", 17)
-    essential_demand = data.get("essential_goods_demand", 1.0)
-    demand_sensitivity = data.get("demand_sensitivity", 0.35)
-    shock_prob = data.get("shock_probability", 0.0)
-    inflation = data.get("inflation_rate", 0.0)
-
-    raw_params = data.get("raw_firm_params", {})
-    raw_params.setdefault("base_wage", 7.0)
-    raw_params.setdefault("production_factor", 2.0)
-    raw_params.setdefault("material_price", 3.8)
-    raw_params.setdefault("min_employees", 2)
-    raw_params.setdefault("max_capacity", 50)
-
-    manu_params = data.get("manu_firm_params", {})
-    manu_params.setdefault("base_wage", 9.0)
-    manu_params.setdefault("sale_price", 20.0)
-    manu_params.setdefault("material_cost", 3.5)
-    manu_params.setdefault("min_employees", 2)
-    manu_params.setdefault("max_capacity", 50)
-
-    retail_params = data.get("retail_firm_params", {})
-    retail_params.setdefault("base_wage", 5.0)
-    retail_params.setdefault("wholesale_price", 8.0)
-    retail_params.setdefault("retail_price", 18.0)
-    retail_params.setdefault("max_capacity", 50)
-
-    param_config = {
-        "num_households": data.get("num_households", 50),
-        "num_raw_firms": data.get("num_raw_firms", 2),
-        "num_manu_firms": data.get("num_manu_firms", 1),
-        "num_retail_firms": data.get("num_retail_firms", 1),
-        "num_generic_firms": data.get("num_generic_firms", 0),
-        "episode_length": episode_length,
-        "infra_decay_rate": data.get("infra_decay_rate", 0.01),
-        "shock_probability": shock_prob,
-        "shock_type": data.get("shock_type", "raw_cut"),
-        "demand_sensitivity": demand_sensitivity,
-        "inflation_rate": inflation,
-        "household_cost_of_living": cost_of_living,
-        "household_wage_min": wage_min,
-        "household_wage_max": wage_max,
-        "essential_goods_demand": essential_demand,
-        "reward_mode": gov_mode,
-        "raw_firm_params": raw_params,
-        "manu_firm_params": manu_params,
-        "retail_firm_params": retail_params,
-        "generic_firm_params": data.get("generic_firm_params", {}),
-    }
-
-    if gov_mode == "custom":
-        custom_weights = data.get("custom_weights", {})
-        param_config["custom_weights"] = custom_weights
-
-    print("[DEBUG] param_config used by website:", param_config)
-
-    model = train_advanced_rl(param_config, total_timesteps=training_steps)
-    env = CityEnv(**param_config)
-    obs = env.reset()
-    done = False
-    step = 0
-    time_steps = []
-    happiness_series = []
-    population_series = []
-    budget_series = []
-    leftover_spend_series = []
-    profit_series = []
-
-    time_steps.append(step)
-    happiness_series.append(env._get_avg_happiness())
-    population_series.append(len(env.households))
-    budget_series.append(env.gov.budget)
-    leftover_spend_series.append(0.0)
-    profit_series.append(0.0)
-
-    while not done:
-        action, _states = model.predict(obs, deterministic=True)
-        obs, reward, done, info = env.step(action)
-        step += 1
-        time_steps.append(step)
-        happiness_series.append(info["avg_happiness"])
-        population_series.append(len(env.households))
-        budget_series.append(env.gov.budget)
-        leftover_spend_series.append(info["leftover_spend"])
-        profit_series.append(info["daily_profits"])
-
-        if step >= episode_length or done:
-            break
-
-    final_hap = happiness_series[-1] if happiness_series else 0.0
-    final_pop = population_series[-1] if population_series else 0
-    final_bud = budget_series[-1] if budget_series else 0.0
-    final_pro = profit_series[-1] if profit_series else 0.0
-
-    response_data = {
-        "time_steps": time_steps,
-        "happiness_series": happiness_series,
-        "population_series": population_series,
-        "budget_series": budget_series,
-        "leftover_spend_series": leftover_spend_series,
-        "profit_series": profit_series,
-        "final_stats": {
-            "final_happiness": final_hap,
-            "final_population": final_pop,
-            "final_budget": final_bud,
-            "final_profit": final_pro
-        },
-        "chosen_gov_mode": gov_mode,
-        "debug_steps": env.debug_step_data
-    }
+    response_data = _simulation().run_simulation(data, num_workers=TRAIN_WORKERS)
     return jsonify(response_data)
 
+@app.route("/run_sim/stream", methods=["POST"])
+def run_sim_stream():
+    # Server-Sent Events by default, newline-delimited JSON with ?format=ndjson
+    data = request.get_json()
+    ndjson = request.args.get("format") == "ndjson"
+
+    def generate():
+        simulation = _simulation()
+        for event in simulation.iter_simulation(data, num_workers=TRAIN_WORKERS, stream_training=True):
+            payload = json.dumps(event, default=simulation.to_json)
+            if ndjson:
+                yield payload + "\n"
+            else:
+                yield f"event: {event['event']}\ndata: {payload}\n\n"
+
+    mimetype = "application/x-ndjson" if ndjson else "text/event-stream"
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    data = request.get_json() or {}
+    job_id = jobs.submit(data)
+    return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "unknown job"}), 404
+    return jsonify(status)
+
+@app.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    state, result = jobs.result(job_id)
+    if state is None:
+        return jsonify({"error": "unknown job"}), 404
+    if state == "failed":
+        return jsonify({"status": state, "error": result}), 500
+    if state != "done":
+        return jsonify({"status": state}), 202
+    return jsonify(result)
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    # Step timings of rollouts served by this process (job workers keep their own);
+    # JSON by default, Prometheus text with ?format=prometheus
+    simulation = sys.modules.get("simulation")
+    profile = simulation.get_step_profile(reset=request.args.get("reset") == "1") if simulation else None
+    if request.args.get("format") != "prometheus":
+        return jsonify({"uptime_seconds": time.time() - STARTED_AT, "step_profile": profile})
+
+    lines = [f"city_uptime_seconds {time.time() - STARTED_AT}"]
+    if profile:
+        lines.append(f"city_steps_total {profile['steps']}")
+        lines.append(f"city_step_seconds_total {profile['step_total_s']}")
+        for kind in ("phases", "methods"):
+            label = kind[:-1]
+            for name, entry in profile[kind].items():
+                lines.append(f'city_step_{label}_seconds_total{{{label}="{name}"}} {entry["total_s"]}')
+                lines.append(f'city_step_{label}_calls_total{{{label}="{name}"}} {entry["calls"]}')
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({
+        "status": "ok",
+        "uptime_seconds": time.time() - STARTED_AT,
+        "simulation_loaded": "simulation" in sys.modules,
+        "prewarmed": prewarmed.is_set(),
+    })
+
+def prewarm(workers=True):
+    # Pays the import and first-reset costs ahead of the first request; also usable as a
+    # WSGI server hook. workers=True starts the job pool and imports the stack in each worker.
+    simulation = _simulation()
+    simulation.get_policy_cache()
+    simulation.CityEnv(telemetry="off").reset()
+    if workers:
+        jobs.prewarm(["simulation"])
+    prewarmed.set()
+
+# Spawned job workers re-run this file as __mp_main__ and must not prewarm themselves
+if os.environ.get("PREWARM", "0") == "1" and __name__ != "__mp_main__":
+    threading.Thread(target=prewarm, daemon=True).start()
+
 @app.route("/")
 def index():
     return send_from_directory("build", "index.html")
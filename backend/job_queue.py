@@ -0,0 +1,148 @@
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _run_target(target, *args):
+    # "module:function" targets are imported in the worker, never by the submitting process
+    if isinstance(target, str):
+        module, name = target.split(":")
+        target = getattr(importlib.import_module(module), name)
+    return target(*args)
+
+
+def _import_modules(modules):
+    for module in modules:
+        importlib.import_module(module)
+    return os.getpid()
+
+
+# Runs simulation jobs in a local process pool. Workers publish training progress to a
+# shared dict; finished results are kept for result_ttl seconds, at most max_jobs overall.
+class JobQueue:
+
+    def __init__(self, target, max_workers=None, max_jobs=100, result_ttl=3600):
+        self.target = target
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._manager = None
+        self._progress = None
+
+    def _ensure_started(self):
+        # Started lazily so importing the app never forks; spawn keeps torch/Flask state out of workers
+        if self._executor is None:
+            ctx = multiprocessing.get_context("spawn")
+            self._manager = ctx.Manager()
+            self._progress = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+
+    def prewarm(self, modules=()):
+        # Starts the workers now and imports modules in each, so the first job pays for neither
+        with self._lock:
+            self._ensure_started()
+            workers = self.max_workers or os.cpu_count() or 1
+            return [self._executor.submit(_import_modules, tuple(modules)) for _ in range(workers)]
+
+    def submit(self, payload):
+        with self._lock:
+            self._ensure_started()
+            self._evict()
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "job_id": job_id,
+                "submitted_at": time.time(),
+                "finished_at": None,
+                "result": None,
+                "error": None,
+                "progress": None,
+            }
+            job["future"] = self._executor.submit(_run_target, self.target, job_id, payload,
+                                                  self._progress)
+            self._jobs[job_id] = job
+
+        job["future"].add_done_callback(lambda future: self._finish(job_id, future))
+        return job_id
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["finished_at"] = time.time()
+            job["progress"] = self._progress.pop(job_id, None)
+            if future.exception() is not None:
+                job["error"] = repr(future.exception())
+            else:
+                job["result"] = future.result()
+
+    def _evict(self):
+        now = time.time()
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None]
+        for job_id in finished:
+            if now - self._jobs[job_id]["finished_at"] > self.result_ttl:
+                del self._jobs[job_id]
+
+        # Over capacity: drop the oldest finished jobs first, never running ones
+        for job_id in finished:
+            if len(self._jobs) <= self.max_jobs:
+                break
+            self._jobs.pop(job_id, None)
+
+    def _state(self, job):
+        if job["finished_at"] is not None:
+            return "failed" if job["error"] is not None else "done"
+        if job["future"].running() or job["job_id"] in self._progress:
+            return "running"
+        return "queued"
+
+    def status(self, job_id):
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+
+            state = self._state(job)
+            progress = job["progress"]
+            if progress is None and self._progress is not None:
+                progress = self._progress.get(job_id)
+
+            status = {
+                "job_id": job_id,
+                "status": state,
+                "submitted_at": job["submitted_at"],
+                "finished_at": job["finished_at"],
+                "error": job["error"],
+            }
+            if progress:
+                done = progress["timesteps_done"]
+                total = progress["total_timesteps"]
+                elapsed = time.time() - progress["started_at"]
+                status["timesteps_done"] = done
+                status["total_timesteps"] = total
+                if state == "running" and done > 0:
+                    status["eta_seconds"] = max(elapsed / done * (total - done), 0.0)
+            return status
+
+    def result(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, None
+            return self._state(job), job["result"] if job["error"] is None else job["error"]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
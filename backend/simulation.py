@@ -0,0 +1,341 @@
+import sys
+import os
+import queue
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CITY_SIM_DIR = os.path.join(BASE_DIR, "city_sim")
+if CITY_SIM_DIR not in sys.path:
+    sys.path.append(CITY_SIM_DIR)
+
+from city_env import CityEnv
+from evaluation import evaluate_policy
+from planner import CONTROLLERS, LookaheadPlanner
+from policy_cache import PolicyCache, get_or_train
+from profiler import StepProfiler
+
+# Shared on disk by the request thread and every job worker process
+POLICY_CACHE_DIR = os.environ.get("POLICY_CACHE_DIR", os.path.join(BASE_DIR, "backend", "policy_cache"))
+POLICY_CACHE_SIZE = int(os.environ.get("POLICY_CACHE_SIZE", 64))
+# On a cache miss, fine-tune the nearest cached policy for this fraction of training_steps
+# (0 always trains from scratch); a request's "warm_start" field overrides it
+WARM_START = float(os.environ.get("WARM_START", 0.25))
+# Step timing for rollouts served by this process: "phases", "full" (adds agent methods,
+# slowing every env in the process) or "off"
+STEP_PROFILE = os.environ.get("STEP_PROFILE", "phases")
+# Seeded rollouts per request for the Monte Carlo evaluation (0 skips it) and how they run:
+# "vector" (one VectorCities) or "envs" (one CityEnv each); requests may override both
+EVAL_ROLLOUTS = int(os.environ.get("EVAL_ROLLOUTS", 0))
+EVAL_ENGINE = os.environ.get("EVAL_ENGINE", "vector")
+# Who governs the rollout: "ppo" (trained or cached policy) or "planner" (lookahead search,
+# no training); a request's "controller" field overrides it
+CONTROLLER = os.environ.get("CONTROLLER", "ppo")
+# Request fields -> LookaheadPlanner arguments
+PLANNER_FIELDS = {"planner_horizon": "horizon", "planner_budget": "budget",
+                  "planner_scenarios": "scenarios", "planner_samples": "samples"}
+
+_policy_cache = None
+_step_profile = None
+_step_profile_lock = threading.Lock()
+
+
+def get_policy_cache():
+    global _policy_cache
+    if _policy_cache is None and POLICY_CACHE_SIZE > 0:
+        _policy_cache = PolicyCache(POLICY_CACHE_DIR, max_entries=POLICY_CACHE_SIZE)
+    return _policy_cache
+
+
+def get_step_profile(reset=False):
+    # Step timings summed over every rollout this process has finished
+    with _step_profile_lock:
+        if _step_profile is None:
+            return None
+        report = _step_profile.report()
+        if reset:
+            _step_profile.reset()
+        return report
+
+
+def _record_step_profile(env):
+    global _step_profile
+    if env.profiler is None:
+        return
+    with _step_profile_lock:
+        if _step_profile is None:
+            _step_profile = StepProfiler(env.profiler.level)
+        _step_profile.merge(env.profiler)
+
+
+def build_param_config(data):
+    gov_mode = data.get("reward_mode", "basic_happiness")
+    episode_length = data.get("episode_length", 60)
+    cost_of_living = data.get("household_cost_of_living", 7.0)
+    wage_min = data.get("household_wage_min", 13)
+    wage_max = data.get("household_wage_max", 17)
+    essential_demand = data.get("essential_goods_demand", 1.0)
+    demand_sensitivity = data.get("demand_sensitivity", 0.35)
+    shock_prob = data.get("shock_probability", 0.0)
+    inflation = data.get("inflation_rate", 0.0)
+
+    raw_params = data.get("raw_firm_params", {})
+    raw_params.setdefault("base_wage", 7.0)
+    raw_params.setdefault("production_factor", 2.0)
+    raw_params.setdefault("material_price", 3.8)
+    raw_params.setdefault("min_employees", 2)
+    raw_params.setdefault("max_capacity", 50)
+
+    manu_params = data.get("manu_firm_params", {})
+    manu_params.setdefault("base_wage", 9.0)
+    manu_params.setdefault("sale_price", 20.0)
+    manu_params.setdefault("material_cost", 3.5)
+    manu_params.setdefault("min_employees", 2)
+    manu_params.setdefault("max_capacity", 50)
+
+    retail_params = data.get("retail_firm_params", {})
+    retail_params.setdefault("base_wage", 5.0)
+    retail_params.setdefault("wholesale_price", 8.0)
+    retail_params.setdefault("retail_price", 18.0)
+    retail_params.setdefault("max_capacity", 50)
+
+    param_config = {
+        "num_households": data.get("num_households", 50),
+        "num_raw_firms": data.get("num_raw_firms", 2),
+        "num_manu_firms": data.get("num_manu_firms", 1),
+        "num_retail_firms": data.get("num_retail_firms", 1),
+        "num_generic_firms": data.get("num_generic_firms", 0),
+        "episode_length": episode_length,
+        "infra_decay_rate": data.get("infra_decay_rate", 0.01),
+        "shock_probability": shock_prob,
+        "shock_type": data.get("shock_type", "raw_cut"),
+        "demand_sensitivity": demand_sensitivity,
+        "inflation_rate": inflation,
+        "household_cost_of_living": cost_of_living,
+        "household_wage_min": wage_min,
+        "household_wage_max": wage_max,
+        "essential_goods_demand": essential_demand,
+        "reward_mode": gov_mode,
+        "action_mode": data.get("action_mode", "flat"),
+        "raw_firm_params": raw_params,
+        "manu_firm_params": manu_params,
+        "retail_firm_params": retail_params,
+        "generic_firm_params": data.get("generic_firm_params", {}),
+    }
+
+    if gov_mode == "custom":
+        custom_weights = data.get("custom_weights", {})
+        param_config["custom_weights"] = custom_weights
+
+    return param_config
+
+
+def _train_advanced_rl(param_config, **kwargs):
+    # Imported on a cache miss only, so processes serving cached policies never load torch
+    from government_rl import train_advanced_rl
+    return train_advanced_rl(param_config, **kwargs)
+
+
+def _train(param_config, training_steps, data, num_workers, progress):
+    # Rollouts run on the NumpyPolicy export of the trained PPO model
+    warm_start = float(data.get("warm_start", WARM_START))
+    return get_or_train(get_policy_cache(), param_config, training_steps,
+                        _train_advanced_rl, seed=data.get("seed"), compiled=True,
+                        warm_start=warm_start or None,
+                        num_workers=num_workers, progress=progress)
+
+
+def _train_in_background(param_config, training_steps, data, num_workers, progress):
+    # Training runs on a helper thread so its progress can be yielded as it happens
+    events = queue.Queue()
+    outcome = {}
+
+    def report(timesteps_done, total_timesteps):
+        if progress is not None:
+            progress(timesteps_done, total_timesteps)
+        events.put({"event": "progress",
+                    "timesteps_done": int(timesteps_done),
+                    "total_timesteps": int(total_timesteps)})
+
+    def target():
+        try:
+            outcome["trained"] = _train(param_config, training_steps, data, num_workers, report)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            events.put(None)
+
+    threading.Thread(target=target, daemon=True).start()
+    while True:
+        event = events.get()
+        if event is None:
+            break
+        yield event
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["trained"]
+
+
+def iter_simulation(data, num_workers=1, progress=None, stream_training=False):
+    # Yields "progress", "step", optional "evaluation" and "done" events; run_simulation and
+    # the SSE endpoint share it
+    param_config = build_param_config(data)
+    gov_mode = param_config["reward_mode"]
+    episode_length = param_config["episode_length"]
+    training_steps = data.get("training_steps", 15000)
+
+    print("[DEBUG] param_config used by website:", param_config)
+
+    controller = data.get("controller", CONTROLLER)
+    if controller not in CONTROLLERS:
+        raise ValueError(f"Unknown controller: {controller}")
+
+    policy = planner = None
+    cache_hit = False
+    if controller == "planner":
+        planner = LookaheadPlanner(param_config, seed=data.get("seed"),
+                                   **{arg: int(data[field]) for field, arg in PLANNER_FIELDS.items()
+                                      if field in data})
+        # Nothing to train: progress counts the planner's decisions, one per episode step
+        if progress is not None:
+            progress(0, episode_length)
+    else:
+        if stream_training:
+            policy, cache_hit = yield from _train_in_background(
+                param_config, training_steps, data, num_workers, progress)
+        else:
+            policy, cache_hit = _train(param_config, training_steps, data, num_workers, progress)
+        yield {"event": "trained", "policy_cache_hit": cache_hit, "chosen_gov_mode": gov_mode}
+
+    env = CityEnv(seed=data.get("seed"), profile=STEP_PROFILE, **param_config)
+    obs = env.reset()
+    done = False
+    step = 0
+
+    yield {
+        "event": "step",
+        "step": step,
+        "avg_happiness": env._get_avg_happiness(),
+        "population": len(env.households),
+        "budget": env.gov.budget,
+        "leftover_spend": 0.0,
+        "daily_profits": 0.0,
+    }
+
+    while not done:
+        if planner is not None:
+            action = planner.plan(env)
+            if progress is not None:
+                progress(planner.decisions, episode_length)
+        else:
+            action, _states = policy.predict(obs, deterministic=True)
+        chosen = env.decode_action(action)
+        obs, reward, done, info = env.step(action)
+        step += 1
+        yield {
+            "event": "step",
+            "step": step,
+            "action": chosen,
+            "avg_happiness": info["avg_happiness"],
+            "population": len(env.households),
+            "budget": env.gov.budget,
+            "leftover_spend": info["leftover_spend"],
+            "daily_profits": info["daily_profits"],
+            "debug": env.telemetry.step_record(-1),
+        }
+
+        if step >= episode_length or done:
+            break
+
+    _record_step_profile(env)
+
+    # Monte Carlo evaluation batches a policy's predictions; the planner has none to batch
+    eval_rollouts = int(data.get("eval_rollouts", EVAL_ROLLOUTS))
+    if eval_rollouts > 0 and policy is not None:
+        evaluation = evaluate_policy(policy, param_config, eval_rollouts, seed=data.get("seed"),
+                                     engine=data.get("eval_engine", EVAL_ENGINE))
+        yield {"event": "evaluation", **evaluation}
+
+    yield {
+        "event": "done",
+        "final_stats": {
+            "final_happiness": info["avg_happiness"] if step else env._get_avg_happiness(),
+            "final_population": len(env.households),
+            "final_budget": env.gov.budget,
+            "final_profit": info["daily_profits"] if step else 0.0
+        },
+        "chosen_gov_mode": gov_mode,
+        "policy_cache_hit": cache_hit,
+        "controller": controller,
+        "planner": planner.stats() if planner is not None else None,
+    }
+
+
+def run_simulation(data, num_workers=1, progress=None):
+    time_steps = []
+    happiness_series = []
+    population_series = []
+    budget_series = []
+    leftover_spend_series = []
+    profit_series = []
+    debug_steps = []
+    chosen_actions = []
+    evaluation = None
+
+    for event in iter_simulation(data, num_workers=num_workers, progress=progress):
+        if event["event"] == "step":
+            time_steps.append(event["step"])
+            happiness_series.append(event["avg_happiness"])
+            population_series.append(event["population"])
+            budget_series.append(event["budget"])
+            leftover_spend_series.append(event["leftover_spend"])
+            profit_series.append(event["daily_profits"])
+            if "action" in event:
+                chosen_actions.append(event["action"])
+            if "debug" in event:
+                debug_steps.append(event["debug"])
+        elif event["event"] == "evaluation":
+            evaluation = {key: value for key, value in event.items() if key != "event"}
+        elif event["event"] == "done":
+            summary = event
+
+    return {
+        "time_steps": time_steps,
+        "happiness_series": happiness_series,
+        "population_series": population_series,
+        "budget_series": budget_series,
+        "leftover_spend_series": leftover_spend_series,
+        "profit_series": profit_series,
+        "final_stats": summary["final_stats"],
+        "chosen_gov_mode": summary["chosen_gov_mode"],
+        "policy_cache_hit": summary["policy_cache_hit"],
+        "controller": summary["controller"],
+        "planner": summary["planner"],
+        "chosen_actions": chosen_actions,
+        "debug_steps": debug_steps,
+        "evaluation": evaluation
+    }
+
+
+def to_json(value):
+    # json.dumps fallback for NumPy scalars/arrays that leak out of the env
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def run_job(job_id, data, progress_store):
+    # Entry point for JobQueue worker processes; progress goes to a Manager dict. Training
+    # reports its first progress itself, once the cache has settled the real budget (full
+    # or warm-start fine-tune); planner jobs report decisions out of episode_length.
+    started_at = time.time()
+
+    def report(timesteps_done, total_timesteps):
+        progress_store[job_id] = {
+            "timesteps_done": int(timesteps_done),
+            "total_timesteps": int(total_timesteps),
+            "started_at": started_at,
+        }
+
+    return run_simulation(data, num_workers=1, progress=report)
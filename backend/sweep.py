@@ -0,0 +1,170 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import (CONTROLLER, EVAL_ENGINE, EVAL_ROLLOUTS, PLANNER_FIELDS, build_param_config,
+                        run_simulation, to_json)
+from policy_cache import config_key
+
+# Columns of the consolidated table after the swept parameters
+RESULT_COLUMNS = ("final_happiness", "final_population", "final_budget", "final_profit",
+                  "mean_happiness", "policy_cache_hit", "seconds")
+
+
+def expand_grid(base, grid):
+    # {"shock_probability": [0.0, 0.1], "reward_mode": [...]} -> one request per combination
+    names = sorted(grid)
+    cells = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        cell = json.loads(json.dumps(base))
+        cell.update(zip(names, values))
+        cells.append(cell)
+    return cells
+
+
+def load_spec(path):
+    # Either {"base": {...}, "grid": {...}} or {"configs": [{...}, ...]}; both take /run_sim payloads
+    with open(path) as f:
+        spec = json.load(f)
+    # Sweeps train every cell from scratch unless the spec asks for warm starts
+    base = {"warm_start": 0, **spec.get("base", {})}
+    if "configs" in spec:
+        return [{**json.loads(json.dumps(base)), **config} for config in spec["configs"]]
+    return expand_grid(base, spec.get("grid", {}))
+
+
+def cell_key(data):
+    # Cells that resolve to the same controller, episode and evaluation share one key and run
+    # once; the policy-cache key covers the config, training budget, seed and warm start
+    data = json.loads(json.dumps(data))
+    param_config = build_param_config(data)
+    controller = data.get("controller", CONTROLLER)
+    payload = {"controller": controller, "seed": data.get("seed"),
+               "eval_rollouts": int(data.get("eval_rollouts", EVAL_ROLLOUTS)),
+               "eval_engine": data.get("eval_engine", EVAL_ENGINE)}
+    if controller == "planner":
+        # Planner cells never train, so only the config and planner settings matter
+        payload["config"] = config_key(param_config, 0, data.get("seed"))
+        payload.update({field: int(data[field]) for field in PLANNER_FIELDS if field in data})
+    else:
+        payload["config"] = config_key(param_config, data.get("training_steps", 15000),
+                                       data.get("seed"), warm_start=data.get("warm_start"))
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _init_worker():
+    # One torch thread per worker so a full pool does not oversubscribe the cores
+    import torch
+    torch.set_num_threads(1)
+
+
+def run_cell(data):
+    started = time.time()
+    result = run_simulation(json.loads(json.dumps(data)))
+    happiness = result["happiness_series"]
+    row = dict(result["final_stats"])
+    row["mean_happiness"] = sum(happiness) / len(happiness) if happiness else 0.0
+    row["policy_cache_hit"] = result["policy_cache_hit"]
+    row["seconds"] = time.time() - started
+    return row
+
+
+def _load_checkpoint(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    done[record["key"]] = record["result"]
+    return done
+
+
+def _swept_columns(cells):
+    # Parameters that differ between cells, in first-seen order
+    names = []
+    for cell in cells:
+        names.extend(name for name in cell if name not in names)
+    return [name for name in names if any(cell.get(name) != cells[0].get(name) for cell in cells)]
+
+
+def run_sweep(cells, out_dir, workers=None, resume=True, progress=None):
+    # Trains and evaluates every cell on a local process pool. Finished cells are appended
+    # to out_dir/checkpoint.jsonl as they complete, so rerunning the same sweep resumes.
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint_path = os.path.join(out_dir, "checkpoint.jsonl")
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    keys = [cell_key(cell) for cell in cells]
+    done = _load_checkpoint(checkpoint_path)
+    pending = {}
+    for key, cell in zip(keys, cells):
+        if key not in done and key not in pending:
+            pending[key] = cell
+
+    total = len(set(keys))
+    if progress is not None:
+        progress(total - len(pending), total)
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=ctx,
+                                 initializer=_init_worker) as pool, \
+                open(checkpoint_path, "a") as checkpoint:
+            futures = {pool.submit(run_cell, cell): key for key, cell in pending.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                done[key] = future.result()
+                checkpoint.write(json.dumps({"key": key, "cell": pending[key], "result": done[key]},
+                                            default=to_json) + "\n")
+                checkpoint.flush()
+                if progress is not None:
+                    progress(total - len(pending) + sum(k in done for k in pending), total)
+
+    rows = []
+    for key, cell in zip(keys, cells):
+        rows.append({"cell": cell, "key": key, **done[key]})
+    write_table(rows, _swept_columns(cells), os.path.join(out_dir, "results.csv"))
+    return rows
+
+
+def write_table(rows, swept, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(swept) + list(RESULT_COLUMNS))
+        for row in rows:
+            params = [json.dumps(row["cell"].get(name), default=to_json)
+                      if isinstance(row["cell"].get(name), (dict, list)) else row["cell"].get(name)
+                      for name in swept]
+            writer.writerow(params + [row.get(name) for name in RESULT_COLUMNS])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train and evaluate a grid of /run_sim configs")
+    parser.add_argument("spec", help='JSON file: {"base": {...}, "grid": {...}} or {"configs": [...]}')
+    parser.add_argument("--out", default="sweep_results")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-resume", action="store_true")
+    args = parser.parse_args()
+
+    def report(finished, total):
+        print(f"[sweep] {finished}/{total} cells done", file=sys.stderr, flush=True)
+
+    rows = run_sweep(load_spec(args.spec), args.out, workers=args.workers,
+                     resume=not args.no_resume, progress=report)
+    print(f"[sweep] {len(rows)} rows -> {os.path.join(args.out, 'results.csv')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(BASE_DIR, "backend", "app.py")
+
+# What the backend used to import before it could answer anything
+EAGER_IMPORTS = """
+import sys, time
+start = time.perf_counter()
+sys.path[:0] = [{backend!r}, {city_sim!r}]
+import flask, flask_cors, simulation, government_rl
+print(time.perf_counter() - start)
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, response.read()
+    except (urllib.error.URLError, ConnectionError):
+        return None, None
+
+
+def wait_for(url, start, timeout):
+    while time.perf_counter() - start < timeout:
+        status, body = get(url)
+        if status == 200:
+            return time.perf_counter() - start, body
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def measure(prewarm, timeout):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), PREWARM="1" if prewarm else "0")
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, APP], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}"
+        health_s, body = wait_for(base + "/health", start, timeout)
+        health = json.loads(body)
+        index_s, _ = wait_for(base + "/", start, timeout)
+        warm_s = None
+        if prewarm:
+            while not json.loads(get(base + "/health")[1])["prewarmed"]:
+                time.sleep(0.01)
+            warm_s = time.perf_counter() - start
+        return health_s, index_s, health["simulation_loaded"], warm_s
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time from launching backend/app.py to its first responses")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    eager = subprocess.run(
+        [sys.executable, "-c", EAGER_IMPORTS.format(backend=os.path.join(BASE_DIR, "backend"),
+                                                    city_sim=os.path.join(BASE_DIR, "city_sim"))],
+        capture_output=True, check=True).stdout.decode().split()[-1]
+    print(f"eager imports (flask + simulation + government_rl): {float(eager):.2f} s")
+
+    for prewarm in (False, True):
+        for run in range(args.runs):
+            health_s, index_s, loaded, warm_s = measure(prewarm, args.timeout)
+            line = (f"prewarm={int(prewarm)} run {run}: /health {health_s:.2f} s, / {index_s:.2f} s, "
+                    f"simulation loaded at first request = {loaded}")
+            if warm_s is not None:
+                line += f", prewarmed after {warm_s:.2f} s"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import CityEnv
+from evaluation import evaluate_policy
+from numpy_policy import NumpyPolicy
+
+
+def random_policy(num_actions, hidden, seed):
+    # Untrained MLP of the PPO shape: only the cost of inference matters here
+    rng = np.random.default_rng(seed)
+    sizes = [4, hidden, hidden, num_actions]
+    weights = [rng.normal(size=(a, b)) / np.sqrt(a) for a, b in zip(sizes[:-1], sizes[1:])]
+    return NumpyPolicy(weights, [np.zeros(b) for b in sizes[1:]])
+
+
+def sequential(policy, num_rollouts, seed):
+    # K single rollouts back to back, one predict call per env step
+    for i in range(num_rollouts):
+        env = CityEnv(seed=seed + i, telemetry="off")
+        obs = env.reset()
+        done = False
+        while not done:
+            action, _ = policy.predict(obs, deterministic=True)
+            obs, _, done, _ = env.step(action)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation cost by engine and rollout count")
+    parser.add_argument("--rollouts", type=int, nargs="*", default=[1, 8, 32, 128])
+    parser.add_argument("--hidden", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    policy = random_policy(len(CityEnv().actions), args.hidden, args.seed)
+    # Warm-up run, kept out of the timings
+    evaluate_policy(policy, {}, 1, seed=args.seed, engine="vector")
+
+    for k in args.rollouts:
+        start = time.perf_counter()
+        sequential(policy, k, args.seed)
+        times = {"sequential": time.perf_counter() - start}
+        for engine in ("envs", "vector"):
+            start = time.perf_counter()
+            result = evaluate_policy(policy, {}, k, seed=args.seed, engine=engine)
+            times[engine] = time.perf_counter() - start
+        final = result["final"]["happiness"]
+        print(f"rollouts={k}: " + ", ".join(f"{name} {1e3 * s:.1f} ms" for name, s in times.items())
+              + f"; final happiness {final['mean']:.2f} [{final['p10']:.2f}, {final['p90']:.2f}]")
+
+
+if __name__ == "__main__":
+    main()
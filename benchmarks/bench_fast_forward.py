@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import CityEnv
+
+
+def run(backend, args):
+    env = CityEnv(
+        num_households=args.households,
+        episode_length=args.steps,
+        reward_mode=args.reward_mode,
+        household_backend=backend,
+        telemetry="off",
+        seed=args.seed,
+    )
+    env.reset()
+    rewards = []
+    done = False
+    start = time.perf_counter()
+    while not done:
+        _, reward, done, _ = env.step(args.action)
+        rewards.append(reward)
+    return time.perf_counter() - start, np.array(rewards), env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact vs fast-forwarded fixed-action evaluation")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--households", type=int, default=20000)
+    parser.add_argument("--reward-mode", default="growth")
+    parser.add_argument("--action", type=int, default=744)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    exact_s, exact, _ = run("arrays", args)
+    fast_s, fast, env = run("steady", args)
+
+    print(f"arrays: {exact_s:.2f} s ({1e6 * exact_s / args.steps:.1f} us/step)")
+    print(f"steady: {fast_s:.2f} s ({1e6 * fast_s / args.steps:.1f} us/step), "
+          f"fast-forwarded {env.households.fast_steps}/{args.steps} steps")
+    print(f"speedup = {exact_s / fast_s:.1f}x, "
+          f"max reward difference = {np.abs(exact - fast).max():.3g}, "
+          f"final population = {len(env.households)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import CityEnv
+from firm import Firm
+from manufacturer_firm import ManufacturerFirm
+from raw_material_firm import RawMaterialFirm
+from retail_firm import RetailFirm
+
+COUNTED = ("compute_revenue", "compute_wages_paid", "compute_profit", "produce_final_goods")
+
+calls = Counter()
+
+
+def count_calls():
+    # Wrap each firm class's own accounting methods with a call counter
+    for cls in (Firm, RawMaterialFirm, ManufacturerFirm, RetailFirm):
+        for name in COUNTED:
+            if name not in vars(cls):
+                continue
+
+            def wrapper(self, *args, __fn=vars(cls)[name], __name=name, **kwargs):
+                calls[__name] += 1
+                return __fn(self, *args, **kwargs)
+
+            setattr(cls, name, wrapper)
+
+
+def check_side_effect_free(env):
+    # Recomputing a manufacturer's books must give the same record and leave inventory alone
+    for mf in env.manu_firms_list:
+        inventory = mf.inventory
+        mf.open_books()
+        first = mf.close_books()
+        mf.open_books()
+        if mf.close_books() != first or mf.inventory != inventory:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accounting calls per firm per CityEnv step")
+    parser.add_argument("--episodes", type=int, default=50)
+    parser.add_argument("--raw-firms", type=int, default=20)
+    parser.add_argument("--manu-firms", type=int, default=10)
+    parser.add_argument("--retail-firms", type=int, default=10)
+    parser.add_argument("--generic-firms", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count_calls()
+    env = CityEnv(
+        num_raw_firms=args.raw_firms,
+        num_manu_firms=args.manu_firms,
+        num_retail_firms=args.retail_firms,
+        num_generic_firms=args.generic_firms,
+        telemetry="off",
+        seed=args.seed,
+    )
+    actions = random.Random(args.seed)
+
+    firm_steps = 0
+    elapsed = 0.0
+    stable = True
+    for _ in range(args.episodes):
+        env.reset()
+        done = False
+        while not done:
+            firm_steps += (len(env.raw_firms_list) + len(env.manu_firms_list)
+                           + len(env.retail_firms_list) + len(env.generic_firms_list))
+            start = time.perf_counter()
+            _, _, done, _ = env.step(actions.randrange(env.action_space_size))
+            elapsed += time.perf_counter() - start
+            counted = calls.copy()
+            stable = stable and check_side_effect_free(env)
+            calls.clear()
+            calls.update(counted)
+
+    for name in COUNTED:
+        print(f"{name}: {calls[name] / firm_steps:.2f} calls per firm-step")
+    print(f"step = {1e6 * elapsed / (args.episodes * env.episode_length):.1f} us, "
+          f"side-effect free = {stable}")
+
+
+if __name__ == "__main__":
+    main()
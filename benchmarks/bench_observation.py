@@ -0,0 +1,30 @@
+import argparse
+import os
+import sys
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import CityEnv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of one CityEnv observation per household backend")
+    parser.add_argument("--households", type=int, default=20000)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for backend in ("objects", "arrays", "steady"):
+        env = CityEnv(num_households=args.households, household_backend=backend,
+                      telemetry="off", seed=args.seed)
+        env.reset()
+        env.step(0)
+        obs_s = timeit.timeit(env._get_observation, number=args.number) / args.number
+        print(f"{backend}: {1e6 * obs_s:.2f} us per observation, "
+              f"dtype = {env._get_observation().dtype}, in place = {env._get_observation() is env._obs}")
+
+
+if __name__ == "__main__":
+    main()
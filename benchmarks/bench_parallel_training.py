@@ -0,0 +1,29 @@
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from government_rl import train_advanced_rl
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall-clock PPO training time per worker count")
+    parser.add_argument("--timesteps", type=int, default=15000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        train_advanced_rl({}, total_timesteps=args.timesteps, num_workers=workers, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"workers = {workers}, seconds = {elapsed:.2f}, speedup = {baseline / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import CityEnv
+from planner import LookaheadPlanner
+
+
+def run_episode(seed, choose):
+    env = CityEnv(seed=seed, telemetry="off")
+    env.reset()
+    total, done = 0.0, False
+    while not done:
+        _, reward, done, _ = env.step(choose(env))
+        total += reward
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LookaheadPlanner episode reward and latency vs fixed actions")
+    parser.add_argument("--horizons", type=int, nargs="*", default=[5, 15])
+    parser.add_argument("--budgets", type=int, nargs="*", default=[300, 600])
+    parser.add_argument("--seeds", type=int, nargs="*", default=[0, 1, 2])
+    args = parser.parse_args()
+
+    # Reference: the best single action held for the whole episode, picked in hindsight
+    num_actions = CityEnv().action_space.n
+    best_fixed = max(
+        (sum(run_episode(seed, lambda env: a) for seed in args.seeds) / len(args.seeds), a)
+        for a in range(0, num_actions, 4))
+    print(f"best fixed action {best_fixed[1]} (every 4th searched): reward {best_fixed[0]:.0f}")
+
+    for horizon in args.horizons:
+        for budget in args.budgets:
+            rewards, seconds = [], 0.0
+            for seed in args.seeds:
+                planner = LookaheadPlanner({}, horizon=horizon, budget=budget, seed=seed)
+                start = time.perf_counter()
+                rewards.append(run_episode(seed, planner.plan))
+                seconds += time.perf_counter() - start
+            stats = planner.stats()
+            print(f"horizon={horizon} budget={budget}: reward {sum(rewards) / len(rewards):.0f}, "
+                  f"{seconds / len(args.seeds):.2f} s/episode, "
+                  f"{stats['mean_decision_ms']:.1f} ms/decision")
+
+
+if __name__ == "__main__":
+    main()
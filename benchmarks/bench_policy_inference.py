@@ -0,0 +1,84 @@
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import ACTION_MODES, CityEnv
+from government_rl import train_advanced_rl
+from numpy_policy import NumpyPolicy
+
+# Loads an exported policy and reports whether torch got imported along the way
+SERVE_ONLY = """
+import io, sys
+sys.path.append({city_sim!r})
+from numpy_policy import NumpyPolicy
+policy = NumpyPolicy.load(io.BytesIO(sys.stdin.buffer.read()))
+policy.predict([0.0, 0.0, 0.5, 0.25])
+print("torch" in sys.modules)
+"""
+
+
+def collect_observations(model, action_mode, episodes, seed):
+    env = CityEnv(action_mode=action_mode, telemetry="off", seed=seed)
+    observations = []
+    for _ in range(episodes):
+        obs = env.reset()
+        done = False
+        while not done:
+            observations.append(obs.copy())
+            action, _ = model.predict(obs, deterministic=True)
+            obs, _, done, _ = env.step(action)
+    return observations
+
+
+def time_predict(policy, observations):
+    start = time.perf_counter()
+    actions = [policy.predict(obs, deterministic=True)[0] for obs in observations]
+    return time.perf_counter() - start, np.array(actions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SB3 predict vs NumPy export, per-step rollout inference")
+    parser.add_argument("--training-steps", type=int, default=2048)
+    parser.add_argument("--episodes", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for action_mode in ACTION_MODES:
+        model = train_advanced_rl({"action_mode": action_mode, "telemetry": "off"},
+                                  total_timesteps=args.training_steps, seed=args.seed)
+        policy = NumpyPolicy.from_model(model)
+        observations = collect_observations(model, action_mode, args.episodes, args.seed)
+
+        sb3_s, sb3_actions = time_predict(model, observations)
+        np_s, np_actions = time_predict(policy, observations)
+        start = time.perf_counter()
+        batch_actions, _ = policy.predict(np.array(observations))
+        batch_s = time.perf_counter() - start
+
+        if action_mode == "box":
+            agree = f"max |diff| = {np.abs(sb3_actions - np_actions).max():.2g}"
+        else:
+            agree = f"agree = {np.mean(np.all((sb3_actions == np_actions).reshape(len(observations), -1), axis=1)):.4f}"
+        n = len(observations)
+        print(f"{action_mode}: sb3 {1e6 * sb3_s / n:.1f} us/obs, numpy {1e6 * np_s / n:.1f} us/obs, "
+              f"batched {1e6 * batch_s / n:.2f} us/obs, speedup = {sb3_s / np_s:.1f}x, {agree}, "
+              f"batch matches = {np.allclose(batch_actions, np_actions, rtol=0, atol=1e-5)}")
+
+    buffer = io.BytesIO()
+    policy.save(buffer)
+    loaded_torch = subprocess.run(
+        [sys.executable, "-c", SERVE_ONLY.format(city_sim=os.path.join(BASE_DIR, "city_sim"))],
+        input=buffer.getvalue(), capture_output=True, check=True).stdout.decode().strip()
+    print(f"serve-only process imported torch = {loaded_torch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import CityEnv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Step and reset cost across many CityEnv episodes")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--households", type=int, default=50)
+    parser.add_argument("--household-backend", default="objects", choices=["objects", "arrays"])
+    parser.add_argument("--report-every", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = CityEnv(num_households=args.households, household_backend=args.household_backend,
+                  seed=args.seed)
+    actions = random.Random(args.seed)
+
+    first_step_us = None
+    bucket_step, bucket_reset, bucket_steps = 0.0, 0.0, 0
+    for episode in range(1, args.episodes + 1):
+        start = time.perf_counter()
+        env.reset()
+        bucket_reset += time.perf_counter() - start
+
+        done = False
+        start = time.perf_counter()
+        while not done:
+            _, _, done, _ = env.step(actions.randrange(env.action_space_size))
+            bucket_steps += 1
+        bucket_step += time.perf_counter() - start
+
+        if episode % args.report_every == 0:
+            step_us = 1e6 * bucket_step / bucket_steps
+            reset_us = 1e6 * bucket_reset / args.report_every
+            first_step_us = first_step_us or step_us
+            firms = (len(env.raw_firms_list) + len(env.manu_firms_list)
+                     + len(env.retail_firms_list) + len(env.generic_firms_list))
+            print(
+                f"episodes = {episode}, step = {step_us:.1f} us, reset = {reset_us:.1f} us, "
+                f"firms = {firms}, drift = {step_us / first_step_us:.2f}x"
+            )
+            bucket_step, bucket_reset, bucket_steps = 0.0, 0.0, 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import random
+import timeit
+
+import numpy as np
+
+
+def per_call(n, rng):
+    # Before the env Generator: one random.random() call per household or firm
+    leaving = 0
+    for _ in range(n):
+        leaving += random.random() < 0.3
+    return leaving
+
+
+def bulk_scalars(n, rng):
+    # One bulk draw, consumed element by element as NumPy scalars
+    leaving = 0
+    for draw in rng.random(n):
+        leaving += draw < 0.3
+    return leaving
+
+
+def bulk_floats(n, rng):
+    # One bulk draw, converted to Python floats before the per-object loop (CityEnv today)
+    leaving = 0
+    for draw in rng.random(n).tolist():
+        leaving += draw < 0.3
+    return leaving
+
+
+def step_per_call(households, firms):
+    # One objects-backend step before the Generator: every draw its own call
+    fluct = [random.uniform(0.99, 1.01) for _ in range(firms["raw"])]
+    firm = [(random.random(), random.random()) for n in firms.values() for _ in range(n)]
+    shock = random.random()
+    leave = [random.random() for _ in range(households)]
+    return fluct, firm, shock, leave
+
+
+def step_bulk(households, firms, rng):
+    # The same step's draws as CityEnv makes them now: one call for all firms, one for households
+    u = rng.random(firms["raw"] + 2 * sum(firms.values())).tolist()
+    shock = rng.random()
+    leave = rng.random(households).tolist()
+    return u, shock, leave
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-object uniform draws: random.random() vs bulk Generator draws")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[2, 10, 50, 1000, 100000])
+    parser.add_argument("--households", type=int, nargs="*", default=[50, 1000, 10000])
+    parser.add_argument("--firms", type=int, default=1, help="firms per tier for the per-step timing")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    random.seed(args.seed)
+    for n in args.sizes:
+        number = max(10, 200000 // n)
+        times = {fn.__name__: timeit.timeit(lambda: fn(n, rng), number=number) / number
+                 for fn in (per_call, bulk_scalars, bulk_floats)}
+        print(f"n={n}: " + ", ".join(f"{name} {1e6 * s:.2f} us" for name, s in times.items())
+              + f" (bulk_floats {times['per_call'] / times['bulk_floats']:.2f}x per_call)")
+
+    # The default city's tiers: two raw firms per manufacturer and retailer, no generic firms
+    firms = {"raw": 2 * args.firms, "manu": args.firms, "retail": args.firms, "generic": 0}
+    for h in args.households:
+        number = max(10, 200000 // h)
+        old = timeit.timeit(lambda: step_per_call(h, firms), number=number) / number
+        new = timeit.timeit(lambda: step_bulk(h, firms, rng), number=number) / number
+        print(f"step draws, households={h} firms={sum(firms.values())}: random.random() {1e6 * old:.2f} us, "
+              f"bulk {1e6 * new:.2f} us ({old / new:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
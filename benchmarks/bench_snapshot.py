@@ -0,0 +1,39 @@
+import argparse
+import copy
+import os
+import sys
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+from city_env import CityEnv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CityEnv snapshot/restore vs copy.deepcopy per backend")
+    parser.add_argument("--households", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=30, help="steps taken before forking")
+    parser.add_argument("--number", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for backend in ("objects", "arrays", "steady"):
+        env = CityEnv(num_households=args.households, household_backend=backend,
+                      firm_backend="objects" if backend == "objects" else "arrays", seed=args.seed)
+        env.reset()
+        for _ in range(args.steps):
+            env.step(0)
+        snap = env.snapshot()
+
+        snapshot_s = timeit.timeit(env.snapshot, number=args.number) / args.number
+        restore_s = timeit.timeit(lambda: env.restore(snap), number=args.number) / args.number
+        deepcopy_s = timeit.timeit(lambda: copy.deepcopy(env), number=max(args.number // 10, 1))
+        deepcopy_s /= max(args.number // 10, 1)
+        print(f"{backend}: snapshot {1e6 * snapshot_s:.1f} us ({len(snap)} bytes), "
+              f"restore {1e6 * restore_s:.1f} us ({1 / restore_s:.0f}/s), "
+              f"deepcopy {1e6 * deepcopy_s:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import fnmatch
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "city_sim"))
+
+HOUSEHOLD_SCALES = (50, 1000, 10000, 100000)
+FIRM_SCALES = (1, 10, 100, 1000)
+BACKENDS = ("objects", "arrays")
+
+# Metric suffix -> whether larger values are better; used by --compare
+DIRECTIONS = {"_per_s": True, "_us": False, "_ms": False, "_mb": False}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def bench_env(households, firms_per_tier, backend, budget, seed):
+    from city_env import CityEnv
+
+    env = CityEnv(num_households=households, num_raw_firms=firms_per_tier,
+                  num_manu_firms=firms_per_tier, num_retail_firms=firms_per_tier,
+                  num_generic_firms=firms_per_tier, household_backend=backend,
+                  firm_backend=backend, telemetry="off", seed=seed)
+    actions = env.rng.integers(env.action_space_size, size=env.episode_length)
+
+    resets, reset_s = 0, 0.0
+    steps, step_s = 0, 0.0
+    while resets < 3 or reset_s + step_s < budget:
+        start = time.perf_counter()
+        env.reset()
+        reset_s += time.perf_counter() - start
+        resets += 1
+
+        done = False
+        start = time.perf_counter()
+        while not done:
+            _, _, done, _ = env.step(int(actions[env.current_step]))
+            steps += 1
+        step_s += time.perf_counter() - start
+
+    return {
+        "steps_per_s": steps / step_s,
+        "step_us": 1e6 * step_s / steps,
+        "resets_per_s": resets / reset_s,
+        "reset_us": 1e6 * reset_s / resets,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def bench_training(timesteps, seed):
+    from government_rl import train_advanced_rl
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        train_advanced_rl({"telemetry": "off"}, total_timesteps=timesteps, seed=seed)
+        elapsed = time.perf_counter() - start
+    return {"timesteps_per_s": timesteps / elapsed, "peak_rss_mb": _peak_rss_mb()}
+
+
+def bench_run_sim(timesteps, seed):
+    # Cold request trains into an empty policy cache; the repeat is served from it
+    os.environ.update(POLICY_CACHE_DIR=tempfile.mkdtemp(), TRAIN_WORKERS="1", WARM_START="0")
+    sys.path.append(os.path.join(BASE_DIR, "backend"))
+    from app import app
+
+    client = app.test_client()
+    payload = {"training_steps": timesteps, "seed": seed}
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(2):
+            start = time.perf_counter()
+            response = client.post("/run_sim", json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"/run_sim returned {response.status_code}")
+    return {"cold_ms": 1e3 * latencies[0], "cached_ms": 1e3 * latencies[1],
+            "peak_rss_mb": _peak_rss_mb()}
+
+
+def cases(args):
+    households = [n for n in HOUSEHOLD_SCALES if n <= args.max_households]
+    firms = [n for n in FIRM_SCALES if n <= args.max_firms]
+    for backend in BACKENDS:
+        for n in households:
+            yield f"env/{backend}/households={n}", bench_env, (n, 1, backend, args.budget, args.seed)
+        for n in firms:
+            yield f"env/{backend}/firms={n}", bench_env, (50, n, backend, args.budget, args.seed)
+    yield "train/ppo", bench_training, (args.training_steps, args.seed)
+    yield "backend/run_sim", bench_run_sim, (args.training_steps, args.seed)
+
+
+def run_case(fn, case_args):
+    # A fresh spawned process per case keeps imports, caches and peak RSS separate
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(fn, *case_args).result()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    import numpy
+
+    results = {}
+    for name, fn, case_args in cases(args):
+        if args.only and not any(fnmatch.fnmatchcase(name, pattern) for pattern in args.only):
+            continue
+        results[name] = run_case(fn, case_args)
+        metrics = ", ".join(f"{k} = {v:.4g}" for k, v in results[name].items())
+        print(f"{name}: {metrics}", flush=True)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    # Returns the regressions: metrics that moved the wrong way by more than threshold
+    regressions = []
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            base = baseline["results"].get(name, {}).get(metric)
+            higher_is_better = next((better for suffix, better in DIRECTIONS.items()
+                                     if metric.endswith(suffix)), None)
+            if base is None or higher_is_better is None or base == 0:
+                continue
+            change = (value - base) / base
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse > threshold else ""
+            print(f"{name:32s} {metric:14s} {base:12.4g} -> {value:12.4g} {change:+8.1%} {flag}")
+            if flag:
+                regressions.append((name, metric, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CityEnv, training and /run_sim benchmark suite")
+    parser.add_argument("--out", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--results", help="compare an existing results file instead of running")
+    parser.add_argument("--compare", help="baseline results file; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown (or growth for _us/_ms/_mb) that counts as a regression")
+    parser.add_argument("--only", nargs="*",
+                        help="run cases whose full name matches any of these names or globs, "
+                             "e.g. env/objects/firms=10 or 'env/*/households=*'")
+    parser.add_argument("--max-households", type=int, default=max(HOUSEHOLD_SCALES))
+    parser.add_argument("--max-firms", type=int, default=max(FIRM_SCALES))
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per env case")
+    parser.add_argument("--training-steps", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args)
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"results -> {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
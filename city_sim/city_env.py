@@ -1,14 +1,32 @@
-import random
 import numpy as np
 import gym
 from gym import spaces
 
 from government import Government
 from household import Household
+from household_population import HouseholdPopulation, MODES
+from steady_population import SteadyPopulation
 from raw_material_firm import RawMaterialFirm
 from manufacturer_firm import ManufacturerFirm
 from retail_firm import RetailFirm
 from firm import Firm
+from firm_tier import FirmTier, RawMaterialTier, ManufacturerTier, RetailTier
+from market import SMALL_MARKET, clear_goods_market, clear_small_market
+from labor_market import LaborMarket
+from telemetry import StepTelemetry
+from profiler import StepProfiler
+
+ACTION_MODES = ("flat", "multidiscrete", "box")
+
+# snapshot() layout: a uint64 header, the labor market's slot stacks, then float64 state
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = ("version", "households", "raw", "manu", "retail", "generic", "unemployed",
+                   "employed", "current_step", "shock_triggered", "rng_state_lo", "rng_state_hi",
+                   "rng_inc_lo", "rng_inc_hi", "rng_has_uint32", "rng_uinteger")
+SNAPSHOT_SCALARS = ("cumulative_profit", "household_cost_of_living", "goods_bought_this_step",
+                    "jobs", "tax_rate", "budget", "infrastructure", "happiness_sum")
+FIRM_TIERS = (("raw", RawMaterialTier), ("manu", ManufacturerTier), ("retail", RetailTier),
+              ("generic", FirmTier))
 
 class CityEnv(gym.Env):
   
@@ -37,7 +55,13 @@ class CityEnv(gym.Env):
         generic_firm_params=None,
         tax_rate_values=None,
         infra_fraction_values=None,
-        subsidy_fraction_values=None
+        subsidy_fraction_values=None,
+        action_mode="flat",
+        household_backend="objects",
+        firm_backend="objects",
+        telemetry="full",
+        profile="off",
+        seed=None
     ):
         super().__init__()
 
@@ -67,6 +91,26 @@ class CityEnv(gym.Env):
         self.retail_firm_params  = retail_firm_params or {}
         self.generic_firm_params = generic_firm_params or {}
 
+        # "objects" keeps one Household per resident, "arrays" batches them in a HouseholdPopulation,
+        # "steady" is "arrays" plus closed-form fast-forward while no household can leave
+        if household_backend not in ("objects", "arrays", "steady"):
+            raise ValueError(f"Unknown household_backend: {household_backend}")
+        self.household_backend = household_backend
+
+        # "objects" keeps a list of Firm instances per tier, "arrays" a column-backed FirmTier
+        if firm_backend not in ("objects", "arrays"):
+            raise ValueError(f"Unknown firm_backend: {firm_backend}")
+        self.firm_backend = firm_backend
+
+        # Every stochastic draw in the env and its agents comes from this Generator
+        self.rng = np.random.default_rng(seed)
+
+        # Step logging: "full" (per-step rows), "aggregate" (episode totals) or "off"
+        self.telemetry = StepTelemetry(telemetry, capacity=episode_length)
+
+        # Step timing: "phases" (per step phase), "full" (plus every agent method) or "off"
+        self.profiler = None if profile == "off" else StepProfiler(profile)
+
         # Build 3D action
         if tax_rate_values is None:
             self.tax_rate_values = [round(i * 0.02, 2) for i in range(38)] + [0.75]
@@ -83,21 +127,43 @@ class CityEnv(gym.Env):
         else:
             self.subsidy_fraction_values = subsidy_fraction_values
 
-        self.actions = []
-        for t in self.tax_rate_values:
-            for f in self.infra_fraction_values:
-                for s in self.subsidy_fraction_values:
-                    self.actions.append((t, f, s))
-
-        self.action_space_size = len(self.actions)
-        self.action_space = spaces.Discrete(self.action_space_size)
+        # "flat": one Discrete index into the tax x infra x subsidy table (the original API)
+        # "multidiscrete": one index per lever; "box": the three values themselves
+        if action_mode not in ACTION_MODES:
+            raise ValueError(f"Unknown action_mode: {action_mode}")
+        self.action_mode = action_mode
+        self.actions = None
+        grid_sizes = [len(self.tax_rate_values), len(self.infra_fraction_values),
+                      len(self.subsidy_fraction_values)]
+
+        if action_mode == "flat":
+            self.actions = []
+            for t in self.tax_rate_values:
+                for f in self.infra_fraction_values:
+                    for s in self.subsidy_fraction_values:
+                        self.actions.append((t, f, s))
+            self.action_space_size = len(self.actions)
+            self.action_space = spaces.Discrete(self.action_space_size)
+        elif action_mode == "multidiscrete":
+            self.action_space_size = int(np.prod(grid_sizes))
+            self.action_space = spaces.MultiDiscrete(grid_sizes)
+        else:
+            self.action_space_size = None
+            self.action_space = spaces.Box(
+                low=np.array([min(self.tax_rate_values), min(self.infra_fraction_values),
+                              min(self.subsidy_fraction_values)], dtype=np.float32),
+                high=np.array([max(self.tax_rate_values), max(self.infra_fraction_values),
+                               max(self.subsidy_fraction_values)], dtype=np.float32),
+                dtype=np.float32
+            )
 
         self.observation_space = spaces.Box(
             low=-9999,
             high=9999,
             shape=(4,),
-            dtype=float
+            dtype=np.float32
         )
+        self._obs = np.zeros(4, dtype=np.float32)
 
         self.gov = None
         self.households = []
@@ -106,14 +172,30 @@ class CityEnv(gym.Env):
         self.retail_firms_list= []
         self.generic_firms_list= []
 
+        # Agent objects/storage kept across episodes so reset() recycles instead of rebuilding
+        self._firm_pools = {"raw": [], "manu": [], "retail": [], "generic": []}
+        self._household_pool = []
+        self._households_issued = 0
+        self._population_storage = None
+        # Running happiness total for the "objects" backend; populations keep their own
+        self._happiness_sum = 0.0
+        # Who holds a job, by household slot, and the firm headcount it was last matched to
+        self.labor = LaborMarket(capacity=num_households + episode_length)
+        self.jobs = 0
+
         self.current_step = 0
         self.shock_triggered = False
         self.goods_bought_this_step = 0.0
         self.cumulative_profit = 0.0
-        self.debug_step_data = []
 
         self.shortfall_base_penalty = -0.5
 
+    def seed(self, seed=None):
+        # Called by SB3 with master_seed + worker_index, giving every worker its own stream.
+        # SB3's Gym wrapper also routes reset(seed=...) here.
+        self.rng = np.random.default_rng(seed)
+        return [seed]
+
     def reset(self):
         if self.household_wage_min > self.household_wage_max:
             self.household_wage_min, self.household_wage_max = \
@@ -121,7 +203,8 @@ class CityEnv(gym.Env):
 
         self.current_step = 0
         self.cumulative_profit = 0.0
-        self.debug_step_data = []
+        self.goods_bought_this_step = 0.0
+        self.telemetry.reset()
 
         # Create government
         self.gov = Government(tax_rate=0.0, possible_tax_rates=self.tax_rate_values)
@@ -129,91 +212,530 @@ class CityEnv(gym.Env):
         self.gov.infrastructure = 0.0
 
         # Households
-        self.households = []
-        for _ in range(self.num_households):
-            wage = random.randint(self.household_wage_min, self.household_wage_max)
-            hh = Household(
-                wage=wage,
+        wages = self.rng.integers(self.household_wage_min, self.household_wage_max,
+                                  size=self.num_households, endpoint=True)
+        if self.household_backend != "objects":
+            if self._population_storage is None:
+                population_cls = SteadyPopulation if self.household_backend == "steady" else HouseholdPopulation
+                self._population_storage = population_cls(
+                    capacity=self.num_households + self.episode_length)
+            self.households = self._population_storage
+            self.households.clear()
+            self.households.extend(
+                wages,
                 employed=True,
                 cost_of_living=self.household_cost_of_living,
                 mode=self.reward_mode
             )
-            self.households.append(hh)
-
+        else:
+            self.households = []
+            self._households_issued = 0
+            for wage in wages.tolist():
+                hh = self._new_household(
+                    wage=wage,
+                    employed=True,
+                    cost_of_living=self.household_cost_of_living,
+                    mode=self.reward_mode
+                )
+                self.households.append(hh)
+            self._happiness_sum = sum(hh.happiness for hh in self.households)
+        self.labor.reset(np.ones(self.num_households, dtype=bool))
+
+        # Firm tiers are rebuilt from config each episode, reusing pooled objects
         starting_capital = 100.0
 
-        for _ in range(self.num_raw_firms):
-            rf = RawMaterialFirm(**self.raw_firm_params)
-            rf.capital = starting_capital
-            self.raw_firms_list.append(rf)
+        if self.firm_backend == "arrays":
+            self._reset_firm_tiers(starting_capital)
+        else:
+            self.raw_firms_list = self._recycle_firms(
+                "raw", RawMaterialFirm, self.raw_firm_params, self.num_raw_firms, starting_capital)
+            self.manu_firms_list = self._recycle_firms(
+                "manu", ManufacturerFirm, self.manu_firm_params, self.num_manu_firms, starting_capital)
+            self.retail_firms_list = self._recycle_firms(
+                "retail", RetailFirm, self.retail_firm_params, self.num_retail_firms, starting_capital)
+            self.generic_firms_list = self._recycle_firms(
+                "generic", Firm, self.generic_firm_params, self.num_generic_firms, starting_capital)
+        self.jobs = self._count_jobs()
 
-        for _ in range(self.num_manu_firms):
-            mf = ManufacturerFirm(**self.manu_firm_params)
-            mf.capital = starting_capital
-            self.manu_firms_list.append(mf)
+        return self._get_observation()
 
-        for _ in range(self.num_retail_firms):
-            rf = RetailFirm(**self.retail_firm_params)
-            rf.capital = starting_capital
-            self.retail_firms_list.append(rf)
+    def _firm_tiers(self):
+        tiers = self._firm_pools.get("tiers")
+        if tiers is None:
+            tiers = (RawMaterialTier(), ManufacturerTier(), RetailTier(), FirmTier())
+            self._firm_pools["tiers"] = tiers
+        return tiers
+
+    def _reset_firm_tiers(self, starting_capital):
+        raw, manu, retail, generic = self._firm_tiers()
+
+        raw.reset(self.raw_firm_params, self.num_raw_firms, starting_capital)
+        manu.reset(self.manu_firm_params, self.num_manu_firms, starting_capital)
+        retail.reset(self.retail_firm_params, self.num_retail_firms, starting_capital)
+        generic.reset(self.generic_firm_params, self.num_generic_firms, starting_capital)
+
+        self.raw_firms_list = raw
+        self.manu_firms_list = manu
+        self.retail_firms_list = retail
+        self.generic_firms_list = generic
+
+    def _recycle_firms(self, tier, firm_cls, params, count, starting_capital):
+        pool = self._firm_pools[tier]
+        while len(pool) < count:
+            pool.append(firm_cls.__new__(firm_cls))
+
+        firms = pool[:count]
+        for firm in firms:
+            firm.__init__(**params)
+            firm.capital = starting_capital
+        return firms
+
+    def _new_household(self, **kwargs):
+        # Households issued this episode are a prefix of the pool; the rest are free to reuse
+        if self._households_issued < len(self._household_pool):
+            hh = self._household_pool[self._households_issued]
+            hh.__init__(**kwargs)
+        else:
+            hh = Household(**kwargs)
+            self._household_pool.append(hh)
+        self._households_issued += 1
+        return hh
+
+    def decode_action(self, action):
+        if self.action_mode == "flat":
+            return self.actions[int(np.asarray(action).reshape(-1)[0])]
+        if self.action_mode == "multidiscrete":
+            t, f, s = np.asarray(action, dtype=np.int64).reshape(3)
+            return (self.tax_rate_values[t], self.infra_fraction_values[f],
+                    self.subsidy_fraction_values[s])
+        low, high = self.action_space.low, self.action_space.high
+        t, f, s = np.clip(np.asarray(action, dtype=np.float64).reshape(3), low, high)
+        return (float(t), float(f), float(s))
 
-        for _ in range(self.num_generic_firms):
-            gf = Firm(**self.generic_firm_params)
-            gf.capital = starting_capital
-            self.generic_firms_list.append(gf)
+    def step(self, action_idx):
+        if self.profiler is None:
+            return self._step(action_idx)
+        with self.profiler.stepping():
+            return self._step(action_idx)
+
+    def get_profile(self, reset=False):
+        # Cumulative per-phase (and per-method) timings since construction or the last reset
+        if self.profiler is None:
+            return None
+        profile = self.profiler.report()
+        if reset:
+            self.profiler.reset()
+        return profile
+
+    def snapshot(self):
+        # The full simulation state as bytes: households, the four firm tiers, government,
+        # labor market, RNG, step counter and the inflated cost of living. Snapshots are
+        # backend-neutral, so one taken on "objects" restores into "arrays" and back.
+        # Telemetry and profiling are not state and are left out.
+        rng = self.rng.bit_generator.state
+        if rng["bit_generator"] != "PCG64":
+            raise ValueError(f"Cannot snapshot a {rng['bit_generator']} generator")
+        mask = (1 << 64) - 1
+        firms = [self._firm_rows(name, tier_cls) for name, tier_cls in FIRM_TIERS]
+        unemployed, employed = self.labor.state()
+
+        if self.household_backend != "objects":
+            pop = self.households
+            households = [pop.wage, pop.happiness, pop.employed, pop.cost_of_living, pop.mode]
+            happiness_sum = pop.happiness_sum()
+        else:
+            households = [[getattr(hh, field) for hh in self.households]
+                          for field in ("wage", "happiness", "employed", "cost_of_living")]
+            households.append([MODES.index(hh.mode) if hh.mode in MODES else MODES.index("custom")
+                               for hh in self.households])
+            happiness_sum = self._happiness_sum
+
+        header = np.array([SNAPSHOT_VERSION, len(self.households)] + [len(f) for f in firms]
+                          + [len(unemployed), len(employed), self.current_step,
+                             self.shock_triggered,
+                             rng["state"]["state"] & mask, rng["state"]["state"] >> 64,
+                             rng["state"]["inc"] & mask, rng["state"]["inc"] >> 64,
+                             rng["has_uint32"], rng["uinteger"]], dtype=np.uint64)
+        scalars = np.array([self.cumulative_profit, self.household_cost_of_living,
+                            self.goods_bought_this_step, self.jobs, self.gov.tax_rate,
+                            self.gov.budget, self.gov.infrastructure, happiness_sum])
+        floats = np.concatenate([scalars, np.asarray(households, dtype=np.float64).ravel()]
+                                + [f.ravel() for f in firms])
+        return (header.tobytes() + np.concatenate([unemployed, employed]).astype(np.uint64).tobytes()
+                + floats.tobytes())
+
+    def _firm_rows(self, name, tier_cls):
+        firms = getattr(self, f"{name}_firms_list")
+        if self.firm_backend == "arrays":
+            return firms.to_array()
+        return np.array([[getattr(firm, col) for col in tier_cls.COLUMNS] for firm in firms],
+                        dtype=np.float64).reshape(len(firms), len(tier_cls.COLUMNS))
+
+    def restore(self, snapshot):
+        # Puts the env back in the state snapshot() captured and returns its observation.
+        # Agent objects and column buffers are reused, so a restore costs about as much as
+        # copying the state. Telemetry restarts from the restored step.
+        n_header = len(SNAPSHOT_HEADER)
+        header = dict(zip(SNAPSHOT_HEADER, np.frombuffer(snapshot, np.uint64, n_header).tolist()))
+        if header["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {header['version']}")
+        n_slots = header["unemployed"] + header["employed"]
+        slots = np.frombuffer(snapshot, np.uint64, n_slots, 8 * n_header).astype(np.int64)
+        floats = np.frombuffer(snapshot, np.float64, offset=8 * (n_header + n_slots))
+
+        self.rng.bit_generator.state = {
+            "bit_generator": "PCG64",
+            "state": {"state": header["rng_state_lo"] | (header["rng_state_hi"] << 64),
+                      "inc": header["rng_inc_lo"] | (header["rng_inc_hi"] << 64)},
+            "has_uint32": header["rng_has_uint32"],
+            "uinteger": header["rng_uinteger"],
+        }
+        self.current_step = header["current_step"]
+        self.shock_triggered = bool(header["shock_triggered"])
+        (self.cumulative_profit, self.household_cost_of_living, self.goods_bought_this_step,
+         self.jobs, tax_rate, budget, infrastructure, happiness_sum) = floats[:len(SNAPSHOT_SCALARS)].tolist()
+        if self.gov is None:
+            self.gov = Government(tax_rate=tax_rate, possible_tax_rates=self.tax_rate_values)
+        self.gov.tax_rate, self.gov.budget, self.gov.infrastructure = tax_rate, budget, infrastructure
+        pos = len(SNAPSHOT_SCALARS)
+
+        n = header["households"]
+        wage, happiness, employed, cost_of_living, mode = floats[pos:pos + 5 * n].reshape(5, n)
+        pos += 5 * n
+        if self.household_backend != "objects":
+            if self._population_storage is None:
+                population_cls = SteadyPopulation if self.household_backend == "steady" else HouseholdPopulation
+                self._population_storage = population_cls(capacity=n + self.episode_length)
+            self.households = self._population_storage
+            self.households.clear()
+            self.households.extend(wage, happiness, employed.astype(bool), cost_of_living,
+                                   mode.astype(np.int8))
+            self.households._hap_sum = happiness_sum
+        else:
+            self._households_issued = 0
+            self.households = [
+                self._new_household(wage=w, happiness=h, employed=e, cost_of_living=c, mode=MODES[m])
+                for w, h, e, c, m in zip(wage.tolist(), happiness.tolist(), employed.astype(bool).tolist(),
+                                         cost_of_living.tolist(), mode.astype(int).tolist())
+            ]
+            self._happiness_sum = happiness_sum
+        self.labor.load(slots[:header["unemployed"]], slots[header["unemployed"]:])
+
+        tiers = self._firm_tiers() if self.firm_backend == "arrays" else None
+        for t, (name, tier_cls) in enumerate(FIRM_TIERS):
+            count, width = header[name], len(tier_cls.COLUMNS)
+            rows = floats[pos:pos + count * width].reshape(count, width)
+            pos += count * width
+            if tiers is not None:
+                tiers[t].load(rows)
+                setattr(self, f"{name}_firms_list", tiers[t])
+            else:
+                setattr(self, f"{name}_firms_list", self._load_firms(name, tier_cls, rows))
 
+        self.telemetry.reset()
         return self._get_observation()
 
-    def step(self, action_idx):
-        (tax_rate, infra_fraction, subsidy_fraction) = self.actions[action_idx]
+    def _load_firms(self, name, tier_cls, rows):
+        pool = self._firm_pools[name]
+        while len(pool) < len(rows):
+            pool.append(tier_cls.FIRM_CLASS.__new__(tier_cls.FIRM_CLASS))
+        firms = pool[:len(rows)]
+        for firm, row in zip(firms, rows.tolist()):
+            firm.__dict__.update(zip(tier_cls.COLUMNS, row))
+            firm.books = None
+        return firms
+
+    def _step(self, action_idx):
+        prof = self.profiler
+        (tax_rate, infra_fraction, subsidy_fraction) = self.decode_action(action_idx)
         self.gov.set_tax_rate(tax_rate)
+        if prof is not None:
+            prof.lap("action")
+
+        # leftover/spend: demand_sensitivity of each household's leftover money is its
+        # budget for goods in this step's retail market
+        population = len(self.households)
+        if self.household_backend != "objects":
+            leftover, leftover_counts = self.households.leftover_distribution(self.gov.tax_rate)
+            if leftover_counts is None:
+                total_leftover = float(leftover.sum())
+            else:
+                total_leftover = float((leftover_counts * leftover).sum())
+            goods_budgets = self.demand_sensitivity * leftover
+        else:
+            # Kept as Python lists: the retail market clears a few dozen object households
+            # faster without an array round trip (market.clear_small_market)
+            tax_rate = self.gov.tax_rate
+            sensitivity = self.demand_sensitivity
+            goods_budgets = []
+            total_leftover = 0.0
+            for hh in self.households:
+                net_pay = hh.wage * (1 - tax_rate) if hh.employed else 0.0
+                leftover = max(0.0, net_pay - hh.cost_of_living)
+                total_leftover += leftover
+                goods_budgets.append(sensitivity * leftover)
+            leftover_counts = None
+        if prof is not None:
+            prof.lap("leftover")
+
+        # Per-firm profits are only kept when telemetry is "full"
+        log_firms = self.telemetry.full
+
+        # Firms
+        if self.firm_backend == "arrays":
+            firm_result = self._step_firm_tiers(log_firms, goods_budgets, leftover_counts)
+        else:
+            firm_result = self._step_firm_objects(log_firms, goods_budgets, leftover_counts)
+        (total_wages, total_profits, bankrupt_count,
+         (raw_profit_sum, manu_profit_sum, retail_profit_sum, generic_profit_sum),
+         firm_profits) = firm_result
+
+        # Labor market: the step's net change in firm headcount moves households in or
+        # out of work
+        jobs = self._count_jobs()
+        hired, released = self.labor.match(round(jobs - self.jobs))
+        self.jobs = jobs
+        self._set_employed(hired, True)
+        self._set_employed(released, False)
+        if prof is not None:
+            prof.lap("labor")
+
+        # Government
+        self.gov.collect_taxes(total_wages, total_profits)
+        if prof is not None:
+            prof.lap("taxes")
+
+        # Infrastructure
+        if self.gov.budget > 0 and infra_fraction > 0:
+            invest_amt = infra_fraction * self.gov.budget
+            self.gov.budget -= invest_amt
+            self.gov.infrastructure += 0.07 * invest_amt
+
+        # Subsidy
+        if subsidy_fraction > 0 and self.gov.budget > 0:
+            total_subsidy = subsidy_fraction * self.gov.budget
+            self.gov.budget -= total_subsidy
+            portion = total_subsidy / (len(self.households) + 1e-6)
+            if self.household_backend != "objects":
+                self.households.apply_subsidy(portion)
+            else:
+                for hh in self.households:
+                    hh.happiness += 0.02 * portion
+        if prof is not None:
+            prof.lap("infrastructure_subsidy")
+
+        # Inflation
+        if self.inflation_rate > 0:
+            self.household_cost_of_living *= (1 + self.inflation_rate)
+            if self.household_backend != "objects":
+                self.households.set_cost_of_living(self.household_cost_of_living)
+            else:
+                for hh in self.households:
+                    hh.cost_of_living = self.household_cost_of_living
+        if prof is not None:
+            prof.lap("inflation")
+
+        # Infrastructure decay
+        self._apply_infra_decay()
+        if prof is not None:
+            prof.lap("infra_decay")
+
+        # Possibly trigger shock
+        self.shock_triggered = False
+        if self.rng.random() < self.shock_probability:
+            self.shock_triggered = True
+            if self.shock_type == "raw_cut":
+                if self.firm_backend == "arrays":
+                    self.raw_firms_list.apply_production_shock()
+                else:
+                    for rf in self.raw_firms_list:
+                        rf.production_factor *= 0.5
+                        if rf.production_factor < 0.5:
+                            rf.production_factor = 0.5
+        if prof is not None:
+            prof.lap("shock")
+
+        # Goods households bought this step, spread over the population at step start
+        goods_per_household = self.goods_bought_this_step / max(population, 1)
+        shortfall_fraction = 1.0 - min(1.0, goods_per_household / (self.essential_goods_demand + 1e-6))
+        shortfall_penalty = self.shortfall_base_penalty * shortfall_fraction
+
+        # Households
+        if self.household_backend != "objects":
+            self.households.update_happiness(self.gov.infrastructure, self.gov.tax_rate)
+            self.households.add_happiness(shortfall_penalty)
+            leave_draws = self.households.leave_draws(self.rng)
+            leaving = self.households.decide_if_leave(leave_draws)
+            self.households.remove(leaving)
+            if leaving is not None and leaving.any():
+                self.labor.compact(~leaving)
+        else:
+            # Plain floats: NumPy scalars make every per-household comparison slower
+            leave_draws = self.rng.random(len(self.households)).tolist()
+            alive_households = []
+            stays = []
+            happiness_sum = 0.0
+            for hh, draw in zip(self.households, leave_draws):
+                hh.update_happiness(self.gov.infrastructure, self.gov.tax_rate)
+                hh.happiness += shortfall_penalty
+                if hh.happiness < 0:
+                    hh.happiness = 0.0
+                elif hh.happiness > 100:
+                    hh.happiness = 100.0
+
+                stays.append(not hh.decide_if_leave(draw))
+                if stays[-1]:
+                    alive_households.append(hh)
+                    happiness_sum += hh.happiness
+
+            if len(alive_households) < len(self.households):
+                self.labor.compact(stays)
+            self.households = alive_households
+            self._happiness_sum = happiness_sum
+        if prof is not None:
+            prof.lap("households")
+
+        # Immigration
+        avg_hap = self._get_avg_happiness()
+
+        if self.reward_mode == "dark_lord":
+            imm_chance = 0.0
+        elif self.reward_mode == "growth":
+            imm_chance = 0.5
+        else:
+            imm_chance = 0.3
+
+        if avg_hap > 50 and self.rng.random() < imm_chance:
+            from_wage = int(self.rng.integers(self.household_wage_min, self.household_wage_max,
+                                              endpoint=True))
+            self.labor.add(len(self.households), employed=False)
+            if self.household_backend != "objects":
+                self.households.add(
+                    wage=from_wage,
+                    happiness=50.0,
+                    employed=False,
+                    cost_of_living=self.household_cost_of_living,
+                    mode=self.reward_mode
+                )
+            else:
+                new_hh = self._new_household(
+                    wage=from_wage,
+                    happiness=50.0,
+                    employed=False,
+                    cost_of_living=self.household_cost_of_living,
+                    mode=self.reward_mode
+                )
+                self.households.append(new_hh)
+                self._happiness_sum += new_hh.happiness
+        if prof is not None:
+            prof.lap("immigration")
+
+        self.current_step += 1
+        done = (self.current_step >= self.episode_length)
 
-        step_log = {
-            "raw_profits": [],
-            "manu_profits": [],
-            "retail_profits": [],
-            "generic_profits": [],
-            "chosen_tax": tax_rate,
-            "chosen_infra": infra_fraction,
-            "chosen_subsidy": subsidy_fraction,
-            "bankrupt_count": 0,
-            "shock_triggered": False,
+        daily_profits = total_profits
+        self.cumulative_profit += daily_profits
+
+        # Reward
+        reward = self._compute_reward(avg_hap, self.gov.budget, len(self.households),
+                                      daily_profits, total_wages)
+        if prof is not None:
+            prof.lap("reward")
+
+        # Telemetry row, in telemetry.COLUMNS order
+        if self.telemetry.enabled:
+            self.telemetry.record(
+                (tax_rate, infra_fraction, subsidy_fraction,
+                 raw_profit_sum, manu_profit_sum, retail_profit_sum, generic_profit_sum,
+                 len(self.raw_firms_list), len(self.manu_firms_list),
+                 len(self.retail_firms_list), len(self.generic_firms_list),
+                 bankrupt_count, self.shock_triggered, daily_profits,
+                 self.gov.budget, self.gov.infrastructure, avg_hap,
+                 len(self.households), reward),
+                firm_profits
+            )
+        if prof is not None:
+            prof.lap("telemetry")
+
+        # Immigration may have changed the population since avg_hap; the running totals
+        # make re-reading it O(1)
+        obs = self._get_observation()
+        if prof is not None:
+            prof.lap("observation")
+        info = {
+            "avg_happiness": avg_hap,
+            "daily_profits": daily_profits,
+            "cumulative_profits": self.cumulative_profit,
+            "leftover_spend": total_leftover,
+            "goods_sold": self.goods_bought_this_step,
+            "unemployed": self.labor.num_unemployed
         }
+        return obs, reward, done, info
+
+    def _step_firm_objects(self, log_firms, goods_budgets, budget_counts = None):
+        prof = self.profiler
+        raw_profits = [] if log_firms else None
+        manu_profits = [] if log_firms else None
+        retail_profits = [] if log_firms else None
+        generic_profits = [] if log_firms else None
+        raw_profit_sum = manu_profit_sum = retail_profit_sum = generic_profit_sum = 0.0
 
         total_wages = 0.0
         total_profits = 0.0
         bankrupt_count = 0
 
-        # Raw daily fluctuation ±1%
-        for rf in self.raw_firms_list:
-            fluct = random.uniform(0.99, 1.01)
+        # Every uniform this step's firms use, in one Generator call: the raw price
+        # fluctuations, then two per firm tier by tier. That is the same stream as drawing
+        # them tier by tier, without a call's fixed cost per tier, and as plain floats
+        # because NumPy scalars would leak into firm state and slow every later step.
+        num_raw = len(self.raw_firms_list)
+        uniforms = self.rng.random(num_raw + 2 * (num_raw + len(self.manu_firms_list)
+                                                  + len(self.retail_firms_list)
+                                                  + len(self.generic_firms_list))).tolist()
+        pos = num_raw
+
+        def firm_draws(count):
+            nonlocal pos
+            pairs = uniforms[pos:pos + 2 * count]
+            pos += 2 * count
+            return zip(pairs[::2], pairs[1::2])
+
+        # Raw daily fluctuation ±1%, as Generator.uniform(0.99, 1.01) computes it
+        flucts = [0.99 + (1.01 - 0.99) * u for u in uniforms[:num_raw]]
+        for rf, fluct in zip(self.raw_firms_list, flucts):
             rf.material_price *= fluct
             if rf.material_price < 0.5:
                 rf.material_price = 0.5
             elif rf.material_price > 20.0:
                 rf.material_price = 20.0
+        if prof is not None:
+            prof.lap("raw_fluctuation")
 
         total_raw_materials = 0.0
         raw_to_remove = []
-        for rf in self.raw_firms_list:
+        for rf, draws in zip(self.raw_firms_list, firm_draws(num_raw)):
+            rf.open_books()
             produced = rf.materials_produced()
             total_raw_materials += produced
 
-            rf.adjust_employment()
-            w = rf.compute_wages_paid()
-            p = rf.compute_profit()
+            rf.adjust_employment(draws)
+            books = rf.close_books()
 
-            total_wages += w
-            total_profits += p
-            rf.capital += p
+            total_wages += books.wages
+            total_profits += books.profit
+            rf.capital += books.profit
 
             if rf.capital < -300:
                 raw_to_remove.append(rf)
-            step_log["raw_profits"].append(p)
+            raw_profit_sum += books.profit
+            if log_firms:
+                raw_profits.append(books.profit)
 
         for rf in raw_to_remove:
             self.raw_firms_list.remove(rf)
         bankrupt_count += len(raw_to_remove)
+        if prof is not None:
+            prof.lap("raw_firms")
 
         # MANUFACTURER step
         manu_to_remove = []
@@ -222,181 +744,181 @@ class CityEnv(gym.Env):
             for mf in self.manu_firms_list:
                 mf.buy_materials(share)
 
-        for mf in self.manu_firms_list:
-            mf.adjust_employment()
-            w = mf.compute_wages_paid()
-            p = mf.compute_profit()
+        total_final_goods = 0.0
+        for mf, draws in zip(self.manu_firms_list, firm_draws(len(self.manu_firms_list))):
+            mf.open_books()
+            if mf.materials_bought_this_step > 0:
+                total_final_goods += mf.produce_final_goods()
+            mf.adjust_employment(draws)
+            books = mf.close_books()
 
-            total_wages += w
-            total_profits += p
-            mf.capital += p
+            total_wages += books.wages
+            total_profits += books.profit
+            mf.capital += books.profit
 
             if mf.capital < -300:
                 manu_to_remove.append(mf)
-            step_log["manu_profits"].append(p)
+            manu_profit_sum += books.profit
+            if log_firms:
+                manu_profits.append(books.profit)
 
         for mf in manu_to_remove:
             self.manu_firms_list.remove(mf)
         bankrupt_count += len(manu_to_remove)
+        if prof is not None:
+            prof.lap("manu_firms")
 
-        # RETAIL step
+        # RETAIL step: manufacturers' output is split evenly across retailers, which then
+        # sell to households cheapest first
         retail_to_remove = []
+        share = total_final_goods / len(self.retail_firms_list) if self.retail_firms_list else 0.0
         for rf in self.retail_firms_list:
-            # buy_final_goods(0) or incorporate final-goods logic if needed
-            rf.buy_final_goods(0)
-            rf.adjust_employment()
+            rf.open_books()
+            rf.buy_final_goods(share)
+        prices = [rf.retail_price for rf in self.retail_firms_list]
+        inventories = [rf.inventory for rf in self.retail_firms_list]
+        if isinstance(goods_budgets, list) and len(goods_budgets) * len(prices) <= SMALL_MARKET:
+            units_sold = clear_small_market(goods_budgets, prices, inventories,
+                                            self.essential_goods_demand)
+        else:
+            units_sold = clear_goods_market(goods_budgets, prices, inventories,
+                                            self.essential_goods_demand, budget_counts).tolist()
 
-            w = rf.compute_wages_paid()
-            total_wages += w
+        goods_sold = 0.0
+        for rf, units, draws in zip(self.retail_firms_list, units_sold,
+                                    firm_draws(len(self.retail_firms_list))):
+            goods_sold += rf.sell_to_households(units)
+            rf.adjust_employment(draws)
+            books = rf.close_books()
 
-        for rf in self.retail_firms_list:
-            p = rf.compute_profit()
-            total_profits += p
-            rf.capital += p
+            total_wages += books.wages
+            total_profits += books.profit
+            rf.capital += books.profit
 
             if rf.capital < -300:
                 retail_to_remove.append(rf)
-            step_log["retail_profits"].append(p)
+            retail_profit_sum += books.profit
+            if log_firms:
+                retail_profits.append(books.profit)
 
         for rf in retail_to_remove:
             self.retail_firms_list.remove(rf)
         bankrupt_count += len(retail_to_remove)
+        self.goods_bought_this_step = goods_sold
+        if prof is not None:
+            prof.lap("retail_firms")
 
         # GENERIC step
         generic_to_remove = []
-        for gf in self.generic_firms_list:
-            gf.adjust_employment()
-            w = gf.compute_wages_paid()
-            p = gf.compute_profit()
+        for gf, draws in zip(self.generic_firms_list, firm_draws(len(self.generic_firms_list))):
+            gf.open_books()
+            gf.adjust_employment(draws)
+            books = gf.close_books()
 
-            total_wages += w
-            total_profits += p
-            gf.capital += p
+            total_wages += books.wages
+            total_profits += books.profit
+            gf.capital += books.profit
 
             if gf.capital < -300:
                 generic_to_remove.append(gf)
-            step_log["generic_profits"].append(p)
+            generic_profit_sum += books.profit
+            if log_firms:
+                generic_profits.append(books.profit)
 
         for gf in generic_to_remove:
             self.generic_firms_list.remove(gf)
         bankrupt_count += len(generic_to_remove)
+        if prof is not None:
+            prof.lap("generic_firms")
 
-        # Government
-        self.gov.collect_taxes(total_wages, total_profits)
-
-        # Infrastructure
-        if self.gov.budget > 0 and infra_fraction > 0:
-            invest_amt = infra_fraction * self.gov.budget
-            self.gov.budget -= invest_amt
-            self.gov.infrastructure += 0.07 * invest_amt
-
-        # Subsidy
-        if subsidy_fraction > 0 and self.gov.budget > 0:
-            total_subsidy = subsidy_fraction * self.gov.budget
-            self.gov.budget -= total_subsidy
-            portion = total_subsidy / (len(self.households) + 1e-6)
-            for hh in self.households:
-                hh.happiness += 0.02 * portion
-
-        # Inflation
-        if self.inflation_rate > 0:
-            self.household_cost_of_living *= (1 + self.inflation_rate)
-            for hh in self.households:
-                hh.cost_of_living = self.household_cost_of_living
-
-        # Infrastructure decay
-        self._apply_infra_decay()
+        profit_sums = (raw_profit_sum, manu_profit_sum, retail_profit_sum, generic_profit_sum)
+        firm_profits = (raw_profits, manu_profits, retail_profits, generic_profits) if log_firms else None
+        return total_wages, total_profits, bankrupt_count, profit_sums, firm_profits
 
-        # Possibly trigger shock
-        self.shock_triggered = False
-        if random.random() < self.shock_probability:
-            self.shock_triggered = True
-            if self.shock_type == "raw_cut":
-                for rf in self.raw_firms_list:
-                    rf.production_factor *= 0.5
-                    if rf.production_factor < 0.5:
-                        rf.production_factor = 0.5
-        if self.shock_triggered:
-            step_log["shock_triggered"] = True
-
-        # leftover/spend
-        leftover_money_list = []
-        for hh in self.households:
-            net_pay = hh.wage * (1 - self.gov.tax_rate) if hh.employed else 0.0
-            leftover_money_list.append(max(0.0, net_pay - hh.cost_of_living))
-
-        total_leftover = sum(leftover_money_list)
-
-        
-        goods_per_household = 0.0
-        shortfall_fraction = 1.0 - min(1.0, goods_per_household / (self.essential_goods_demand + 1e-6))
-        shortfall_penalty = self.shortfall_base_penalty * shortfall_fraction
-
-        # Households
-        alive_households = []
-        for hh in self.households:
-            hh.update_happiness(self.gov.infrastructure, self.gov.tax_rate)
-            hh.happiness += shortfall_penalty
-            if hh.happiness < 0:
-                hh.happiness = 0.0
-            elif hh.happiness > 100:
-                hh.happiness = 100.0
+    def _step_firm_tiers(self, log_firms, goods_budgets, budget_counts = None):
+        prof = self.profiler
+        raw, manu = self.raw_firms_list, self.manu_firms_list
+        retail, generic = self.retail_firms_list, self.generic_firms_list
+        bankrupt_count = 0
 
-            if not hh.decide_if_leave():
-                alive_households.append(hh)
+        # Raw daily fluctuation ±1%
+        raw.fluctuate_prices(self.rng.uniform(0.99, 1.01, len(raw)))
+        if prof is not None:
+            prof.lap("raw_fluctuation")
 
-        self.households = alive_households
+        raw.open_books()
+        total_raw_materials = float(raw.materials_produced().sum())
+        raw.adjust_employment(self.rng.random((len(raw), 2)))
+        raw_wages, raw_profits = raw.settle()
+        if prof is not None:
+            prof.lap("raw_firms")
 
-        # Immigration
-        avg_hap = self._get_avg_happiness()
+        # MANUFACTURER step
+        if len(manu) and total_raw_materials > 0:
+            manu.buy_materials(total_raw_materials / len(manu))
+        manu.open_books()
+        total_final_goods = float(manu.produce_final_goods().sum())
+        manu.adjust_employment(self.rng.random((len(manu), 2)))
+        manu_wages, manu_profits = manu.settle()
+        if prof is not None:
+            prof.lap("manu_firms")
+
+        # RETAIL step: manufacturers' output is split evenly across retailers, which then
+        # sell to households cheapest first
+        retail.open_books()
+        retail.buy_final_goods(total_final_goods / len(retail) if len(retail) else 0.0)
+        units_sold = clear_goods_market(goods_budgets, retail.retail_price, retail.inventory,
+                                        self.essential_goods_demand, budget_counts)
+        self.goods_bought_this_step = float(retail.sell_to_households(units_sold).sum())
+        retail.adjust_employment(self.rng.random((len(retail), 2)))
+        retail_wages, retail_profits = retail.settle()
+        if prof is not None:
+            prof.lap("retail_firms")
 
-        if self.reward_mode == "dark_lord":
-            imm_chance = 0.0
-        elif self.reward_mode == "growth":
-            imm_chance = 0.5
+        # GENERIC step
+        generic.open_books()
+        generic.adjust_employment(self.rng.random((len(generic), 2)))
+        generic_wages, generic_profits = generic.settle()
+        if prof is not None:
+            prof.lap("generic_firms")
+
+        profit_sums = (float(raw_profits.sum()), float(manu_profits.sum()),
+                       float(retail_profits.sum()), float(generic_profits.sum()))
+        total_wages = float(raw_wages.sum() + manu_wages.sum()
+                            + retail_wages.sum() + generic_wages.sum())
+        total_profits = sum(profit_sums)
+        firm_profits = (raw_profits, manu_profits, retail_profits, generic_profits) if log_firms else None
+
+        for tier in (raw, manu, retail, generic):
+            bankrupt_count += tier.remove_bankrupt()
+        if prof is not None:
+            prof.lap("bankruptcy")
+
+        return total_wages, total_profits, bankrupt_count, profit_sums, firm_profits
+
+    def _count_jobs(self):
+        if self.firm_backend == "arrays":
+            tiers = (self.raw_firms_list, self.manu_firms_list, self.retail_firms_list,
+                     self.generic_firms_list)
+            return float(sum(tier.num_employees.sum() for tier in tiers))
+        return float(sum(firm.num_employees
+                         for firms in (self.raw_firms_list, self.manu_firms_list,
+                                       self.retail_firms_list, self.generic_firms_list)
+                         for firm in firms))
+
+    def _set_employed(self, slots, employed):
+        if not len(slots):
+            return
+        if self.household_backend != "objects":
+            self.households.set_employed(slots, employed)
         else:
-            imm_chance = 0.3
-
-        if avg_hap > 50 and random.random() < imm_chance:
-            from_wage = random.randint(self.household_wage_min, self.household_wage_max)
-            new_hh = Household(
-                wage=from_wage,
-                happiness=50.0,
-                employed=False,
-                cost_of_living=self.household_cost_of_living,
-                mode=self.reward_mode
-            )
-            self.households.append(new_hh)
+            for slot in slots.tolist():
+                self.households[slot].employed = employed
 
-        self.current_step += 1
-        done = (self.current_step >= self.episode_length)
-
-        daily_profits = total_profits
-        self.cumulative_profit += daily_profits
-
-        # Reward
-        reward = self._compute_reward(avg_hap, self.gov.budget, len(self.households),
-                                      daily_profits, total_wages)
-
-        # step_log
-        step_log["bankrupt_count"]        = bankrupt_count
-        step_log["daily_profits_sum"]     = daily_profits
-        step_log["gov_budget"]            = self.gov.budget
-        step_log["infrastructure"]        = self.gov.infrastructure
-        step_log["avg_happiness"]         = avg_hap
-        step_log["population"]            = len(self.households)
-        step_log["reward"]                = reward
-
-        self.debug_step_data.append(step_log)
-
-        obs = self._get_observation()
-        info = {
-            "avg_happiness": avg_hap,
-            "daily_profits": daily_profits,
-            "cumulative_profits": self.cumulative_profit,
-            "leftover_spend": total_leftover
-        }
-        return obs, reward, done, info
+    @property
+    def debug_step_data(self):
+        # Legacy list-of-dicts view of the telemetry, as returned by /run_sim
+        return self.telemetry.to_debug_steps()
 
     def _apply_infra_decay(self):
         if self.infra_decay_rate > 0:
@@ -405,9 +927,11 @@ class CityEnv(gym.Env):
                 self.gov.infrastructure = 0.0
 
     def _get_avg_happiness(self):
+        if self.household_backend != "objects":
+            return self.households.avg_happiness()
         if not self.households:
             return 0.0
-        return sum(hh.happiness for hh in self.households) / len(self.households)
+        return self._happiness_sum / len(self.households)
 
     def _maybe_apply_shock(self):
         pass
@@ -468,11 +992,14 @@ class CityEnv(gym.Env):
             return avg_hap - profit_penalty
 
     def _get_observation(self):
-        b   = self.gov.budget
-        inf = self.gov.infrastructure
-        hap = self._get_avg_happiness()
-        pop = len(self.households)
-        return [b/200.0, inf/50.0, hap/100.0, pop/200.0]
+        # Written into a preallocated buffer, returned as a copy: callers (DummyVecEnv's
+        # terminal_observation, anyone keeping reset()'s result) must not see it change
+        obs = self._obs
+        obs[0] = self.gov.budget / 200.0
+        obs[1] = self.gov.infrastructure / 50.0
+        obs[2] = self._get_avg_happiness() / 100.0
+        obs[3] = len(self.households) / 200.0
+        return obs.copy()
 
     def get_action_space_size(self):
         return self.action_space_size
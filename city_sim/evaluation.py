@@ -0,0 +1,86 @@
+import numpy as np
+
+from city_env import CityEnv
+from vector_cities import VectorCities
+
+EVAL_ENGINES = ("vector", "envs")
+METRICS = ("happiness", "population", "budget", "profit")
+
+
+def _rollouts_vector(policy, param_config, num_rollouts, seed):
+    # One VectorCities steps every city with a fixed number of array operations
+    env = VectorCities(param_config, num_cities = num_rollouts, seed = seed)
+    obs = env.reset()
+    population = env._population()
+    traces = [(env._avg_happiness(population), population, env.budget.copy(),
+               np.zeros(num_rollouts))]
+    total_reward = np.zeros(num_rollouts)
+
+    for _ in range(env.episode_length):
+        actions, _ = policy.predict(obs, deterministic = True)
+        env.step_async(actions)
+        obs, rewards, _, infos = env.step_wait()
+        total_reward += rewards
+        # Cities auto-reset on their last step; infos hold the values from before that
+        traces.append(tuple(np.array([info[key] for info in infos], dtype = np.float64)
+                            for key in ("avg_happiness", "population", "budget", "daily_profits")))
+    return traces, total_reward
+
+
+def _rollouts_envs(policy, param_config, num_rollouts, seed):
+    # K CityEnvs in lockstep: exactly the single-rollout dynamics, stepped one city at a time
+    config = {"telemetry": "off", **param_config}
+    envs = [CityEnv(seed = None if seed is None else seed + i, **config)
+            for i in range(num_rollouts)]
+    obs = np.stack([env.reset() for env in envs])
+    traces = [(np.array([env._get_avg_happiness() for env in envs]),
+               np.array([len(env.households) for env in envs], dtype = np.float64),
+               np.array([env.gov.budget for env in envs]), np.zeros(num_rollouts))]
+    total_reward = np.zeros(num_rollouts)
+
+    for _ in range(envs[0].episode_length):
+        actions, _ = policy.predict(obs, deterministic = True)
+        step = np.zeros((4, num_rollouts))
+        for i, (env, action) in enumerate(zip(envs, actions)):
+            obs_i, reward, _, info = env.step(action)
+            obs[i] = obs_i
+            total_reward[i] += reward
+            step[:, i] = (info["avg_happiness"], len(env.households), env.gov.budget,
+                          info["daily_profits"])
+        traces.append(tuple(step))
+    return traces, total_reward
+
+
+def summarize(values, quantiles = (0.1, 0.5, 0.9)):
+    # values: (..., num_rollouts); mean, std and quantile bands over the last axis
+    values = np.asarray(values, dtype = np.float64)
+    summary = {"mean": values.mean(axis = -1), "std": values.std(axis = -1)}
+    for q, band in zip(quantiles, np.quantile(values, quantiles, axis = -1)):
+        summary[f"p{round(100 * q):02d}"] = band
+    return {key: value.tolist() for key, value in summary.items()}
+
+
+def evaluate_policy(policy, param_config, num_rollouts = 32, seed = None, engine = "vector",
+                    quantiles = (0.1, 0.5, 0.9)):
+    # Monte Carlo evaluation: num_rollouts seeded episodes of one policy, with all
+    # observations of a step batched into a single policy.predict call. "vector" steps
+    # the cities as one VectorCities; "envs" keeps one CityEnv per rollout (seeds seed,
+    # seed + 1, ...) for the exact single-env dynamics at K times the env cost.
+    if engine not in EVAL_ENGINES:
+        raise ValueError(f"Unknown eval engine: {engine}")
+    if num_rollouts < 1:
+        raise ValueError("num_rollouts must be at least 1")
+
+    run = _rollouts_vector if engine == "vector" else _rollouts_envs
+    traces, total_reward = run(policy, param_config, num_rollouts, seed)
+
+    # (metric, step, rollout)
+    series = np.stack([np.stack(step) for step in traces], axis = 1)
+    return {
+        "engine": engine,
+        "rollouts": num_rollouts,
+        "time_steps": list(range(len(traces))),
+        "series": {name: summarize(series[m], quantiles) for m, name in enumerate(METRICS)},
+        "final": {name: summarize(series[m, -1], quantiles) for m, name in enumerate(METRICS)},
+        "total_reward": summarize(total_reward, quantiles),
+    }
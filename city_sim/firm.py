@@ -1,4 +1,8 @@
 import random
+from collections import namedtuple
+
+# One step's accounting for a firm, filled in once by close_books()
+StepBooks = namedtuple("StepBooks", ["revenue", "wages", "costs", "profit"])
 
 class Firm:
     def __init__(self, base_wage = 10.0, num_employees = 5, profitability_factor = 1.0, 
@@ -7,6 +11,7 @@ class Firm:
         self.num_employees = num_employees
         self.profitability_factor = profitability_factor
         self.max_capacity = max_capacity
+        self.books = None
 
     def compute_wages_paid(self):
         return self.base_wage * self.num_employees
@@ -14,15 +19,33 @@ class Firm:
     def compute_revenue(self):
         return self.profitability_factor * self.num_employees * 20.0
 
+    def compute_costs(self):
+        return 0.0
+
     def compute_profit(self):
-        return self.compute_revenue() - self.compute_wages_paid()
+        return self.compute_revenue() - self.compute_wages_paid() - self.compute_costs()
+
+    def open_books(self):
+        self.books = None
+
+    def close_books(self):
+        # Computed once per step; adjust_employment, CityEnv.step and the logs all read it
+        if self.books is None:
+            revenue = self.compute_revenue()
+            wages = self.compute_wages_paid()
+            costs = self.compute_costs()
+            self.books = StepBooks(revenue, wages, costs, revenue - wages - costs)
+        return self.books
 
-    def adjust_employment(self):
-        profit = self.compute_profit()
+    def adjust_employment(self, draws = None):
+        # draws: two uniforms from the env's Generator; the first decides the move
+        if draws is None:
+            draws = (random.random(), random.random())
+        profit = self.close_books().profit
 
         if profit > 10.0 and self.num_employees < self.max_capacity:
-            if random.random() < 0.5:
+            if draws[0] < 0.5:
                 self.num_employees += 1
         elif profit < 0.0 and self.num_employees > 0:
-            if random.random() < 0.5:
+            if draws[0] < 0.5:
                 self.num_employees -= 1
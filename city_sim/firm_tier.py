@@ -0,0 +1,224 @@
+import numpy as np
+
+from firm import Firm, StepBooks
+from raw_material_firm import RawMaterialFirm
+from manufacturer_firm import ManufacturerFirm
+from retail_firm import RetailFirm
+
+
+# Column-per-attribute storage for all firms of one tier: the batched twin of a list of
+# Firm objects. Hiring, profit, wages and bankruptcy run as vector operations, and
+# bankrupt firms are dropped by mask compaction instead of list.remove.
+class FirmTier:
+
+    FIRM_CLASS = Firm
+    COLUMNS = ("base_wage", "num_employees", "profitability_factor", "max_capacity", "capital")
+
+    # adjust_employment thresholds and probabilities, as in the object classes
+    HIRE_ABOVE, FIRE_BELOW = 10.0, 0.0
+    HIRE_PROB, FIRE_PROB = 0.5, 0.5
+
+    def __init__(self, params = None, count = 0, capital = 0.0):
+        self.size = 0
+        self.capacity = 0
+        self._cols = {}
+        self.books = None
+        self.reset(params or {}, count, capital)
+
+    def reset(self, params, count, capital):
+        # Reuses the existing column buffers whenever they are large enough
+        firm = self.FIRM_CLASS(**params)
+        if count > self.capacity or not self._cols:
+            self.capacity = max(count, 2 * self.capacity, 1)
+            self._cols = {name: np.zeros(self.capacity) for name in self.COLUMNS}
+        self.size = count
+        for name in self.COLUMNS:
+            self._cols[name][:count] = getattr(firm, name, 0.0)
+        self._cols["capital"][:count] = capital
+        self.books = None
+
+    def to_array(self):
+        # (size, len(COLUMNS)) copy of every firm's state, for CityEnv.snapshot
+        return np.stack([self._cols[name][:self.size] for name in self.COLUMNS], axis = 1)
+
+    def load(self, values):
+        # Inverse of to_array; books are per step and start closed
+        count = len(values)
+        if count > self.capacity:
+            self.capacity = max(count, 2 * self.capacity)
+            self._cols = {name: np.zeros(self.capacity) for name in self.COLUMNS}
+        for i, name in enumerate(self.COLUMNS):
+            self._cols[name][:count] = values[:, i]
+        self.size = count
+        self.books = None
+
+    def __len__(self):
+        return self.size
+
+    def __getattr__(self, name):
+        cols = self.__dict__.get("_cols")
+        if cols is not None and name in cols:
+            return cols[name][:self.size]
+        raise AttributeError(name)
+
+    def compute_wages_paid(self):
+        return self.base_wage * self.num_employees
+
+    def compute_revenue(self):
+        return self.profitability_factor * self.num_employees * 20.0
+
+    def compute_costs(self):
+        return np.zeros(self.size)
+
+    def compute_profit(self):
+        return self.compute_revenue() - self.compute_wages_paid() - self.compute_costs()
+
+    def open_books(self):
+        self.books = None
+
+    def close_books(self):
+        # Per-firm arrays, computed once per step like Firm.close_books
+        if self.books is None:
+            revenue = self.compute_revenue()
+            wages = self.compute_wages_paid()
+            costs = self.compute_costs()
+            self.books = StepBooks(revenue, wages, costs, revenue - wages - costs)
+        return self.books
+
+    def _min_employees(self):
+        return np.zeros(self.size)
+
+    def _hire(self, hire, draws):
+        self.num_employees[:] += hire
+
+    def _fire(self, fire):
+        self.num_employees[:] -= fire
+
+    def adjust_employment(self, draws = None):
+        # draws: (size, 2) uniforms; column 0 decides the move, column 1 its size
+        if draws is None:
+            draws = np.random.random((self.size, 2))
+        profit = self.close_books().profit
+        emp = self.num_employees
+        hire = ((profit > self.HIRE_ABOVE) & (emp < self.max_capacity)
+                & (draws[:, 0] < self.HIRE_PROB))
+        fire = ((profit < self.FIRE_BELOW) & (emp > self._min_employees())
+                & (draws[:, 0] < self.FIRE_PROB))
+        self._hire(hire, draws)
+        self._fire(fire)
+
+    def settle(self):
+        # Pays wages and books profit into capital; returns (wages, profits) per firm
+        books = self.close_books()
+        self.capital[:] += books.profit
+        return books.wages, books.profit
+
+    def remove_bankrupt(self, threshold = -300.0):
+        bankrupt = self.capital < threshold
+        count = int(bankrupt.sum())
+        if count:
+            keep = np.flatnonzero(~bankrupt)
+            for col in self._cols.values():
+                col[:len(keep)] = col[keep]
+            self.size = len(keep)
+            self.books = None
+        return count
+
+
+class RawMaterialTier(FirmTier):
+
+    FIRM_CLASS = RawMaterialFirm
+    COLUMNS = FirmTier.COLUMNS + ("production_factor", "material_price", "min_employees")
+    HIRE_ABOVE, FIRE_BELOW = 8.0, -8.0
+    HIRE_PROB, FIRE_PROB = 0.4, 0.4
+
+    def materials_produced(self):
+        return self.num_employees * self.production_factor
+
+    def compute_revenue(self):
+        return self.materials_produced() * self.material_price * self.profitability_factor
+
+    def _min_employees(self):
+        return self.min_employees
+
+    def _hire(self, hire, draws):
+        delta = np.where(draws[:, 1] < 0.7, 1.0, 2.0)
+        emp = self.num_employees
+        emp[:] = np.where(hire, np.minimum(emp + delta, self.max_capacity), emp)
+
+    def _fire(self, fire):
+        emp = self.num_employees
+        emp[:] = np.where(fire, np.maximum(self.min_employees, emp - 1), emp)
+
+    def fluctuate_prices(self, factors, low = 0.5, high = 20.0):
+        price = self.material_price
+        price *= factors
+        np.clip(price, low, high, out = price)
+
+    def apply_production_shock(self, factor = 0.5, floor = 0.5):
+        pf = self.production_factor
+        pf *= factor
+        np.maximum(pf, floor, out = pf)
+
+
+class ManufacturerTier(FirmTier):
+
+    FIRM_CLASS = ManufacturerFirm
+    COLUMNS = FirmTier.COLUMNS + ("sale_price", "material_cost", "min_employees", "inventory",
+                                  "materials_bought_this_step", "material_cost_this_step",
+                                  "last_produced")
+    HIRE_ABOVE, FIRE_BELOW = 12.0, -12.0
+    HIRE_PROB, FIRE_PROB = 0.5, 0.5
+
+    def buy_materials(self, share):
+        self.materials_bought_this_step[:] = share
+        self.material_cost_this_step[:] = share * self.material_cost
+        self.inventory[:] += share
+
+    def produce_final_goods(self):
+        # Only firms that have bought materials produce, as CityEnv does for ManufacturerFirm
+        buying = self.materials_bought_this_step > 0
+        produced = np.where(buying, np.minimum(self.inventory, self.num_employees), 0.0)
+        self.inventory[:] -= produced
+        self.last_produced[:] = np.where(buying, produced, self.last_produced)
+        return produced
+
+    def compute_revenue(self):
+        buying = self.materials_bought_this_step > 0
+        return np.where(buying, self.last_produced * self.sale_price * self.profitability_factor, 0.0)
+
+    def compute_costs(self):
+        return self.material_cost_this_step
+
+    def _min_employees(self):
+        return self.min_employees
+
+
+class RetailTier(FirmTier):
+
+    FIRM_CLASS = RetailFirm
+    COLUMNS = FirmTier.COLUMNS + ("wholesale_price", "retail_price", "min_employees", "inventory",
+                                  "goods_bought_this_step", "wholesale_cost_this_step",
+                                  "goods_sold_this_step")
+    HIRE_ABOVE, FIRE_BELOW = 8.0, -8.0
+    HIRE_PROB, FIRE_PROB = 0.4, 0.3
+
+    def buy_final_goods(self, available_goods):
+        self.goods_bought_this_step[:] = available_goods
+        self.wholesale_cost_this_step[:] = available_goods * self.wholesale_price
+        self.inventory[:] += available_goods
+
+    def sell_to_households(self, units_demanded):
+        sold = np.minimum(self.inventory, units_demanded)
+        self.inventory[:] -= sold
+        self.goods_sold_this_step[:] = sold
+        return sold
+
+    def compute_revenue(self):
+        return self.goods_sold_this_step * self.retail_price * self.profitability_factor
+
+    def compute_costs(self):
+        return self.wholesale_cost_this_step
+
+    def _min_employees(self):
+        return self.min_employees
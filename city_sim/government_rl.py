@@ -1,30 +1,123 @@
+import os
+
 import numpy as np
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.save_util import load_from_zip_file
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 
 from city_env import CityEnv
+from evaluation import evaluate_policy
+from numpy_policy import compile_policy
+from vector_city_env import VectorCityEnv
+
+def _make_env(param_config):
+    def _init():
+        # Nobody reads step logs during training
+        return CityEnv(**{"telemetry": "off", **param_config})
+    return _init
+
+class TrainingProgressCallback(BaseCallback):
+    def __init__(self, report, total_timesteps, every = 64):
+        super().__init__()
+        self.report = report
+        self.total_timesteps = total_timesteps
+        self.every = every
+
+    def _on_step(self):
+        if self.n_calls % self.every == 0:
+            self.report(self.num_timesteps, self.total_timesteps)
+        return True
+
+    def _on_training_end(self):
+        self.report(self.num_timesteps, self.total_timesteps)
+
+def save_checkpoint(model, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.zip"
+    model.save(tmp_path)
+    os.replace(tmp_path, path)
+
+class CheckpointEveryCallback(BaseCallback):
+    # Saved between rollouts, once the collected steps have been trained on, so
+    # num_timesteps in the checkpoint is exactly the training already done
+    def __init__(self, path, every = 2048):
+        super().__init__()
+        self.path = path
+        self.every = every
+        self.last_saved = 0
+
+    def _init_callback(self):
+        self.last_saved = self.num_timesteps
+
+    def _on_rollout_start(self):
+        if self.num_timesteps - self.last_saved >= self.every:
+            save_checkpoint(self.model, self.path)
+            self.last_saved = self.num_timesteps
+
+    def _on_step(self):
+        return True
 
-def train_advanced_rl(param_config, total_timesteps = 20000):
-    def _make_env():
-        return CityEnv(**param_config)
+def _rollout_sizes(num_envs, n_steps = 1024, batch_size = 128):
+    # Keep the samples per PPO update near n_steps however many envs collect them
+    per_env = max(n_steps // num_envs, 1)
+    return per_env, min(batch_size, per_env * num_envs)
 
-    vec_env = DummyVecEnv([_make_env])
+def train_advanced_rl(param_config, total_timesteps = 20000, num_cities = None,
+                      num_workers = 1, seed = None, progress = None, init_model = None,
+                      checkpoint_path = None, checkpoint_every = 2048):
+    if num_cities:
+        vec_env = VectorCityEnv(param_config, num_cities = num_cities, seed = seed)
+    elif num_workers > 1:
+        vec_env = SubprocVecEnv([_make_env(param_config) for _ in range(num_workers)])
+    else:
+        vec_env = DummyVecEnv([_make_env(param_config)])
+
+    n_steps, batch_size = _rollout_sizes(vec_env.num_envs)
 
     model = PPO(
         "MlpPolicy",
         vec_env,
         verbose = 1,
-        n_steps = 1024,
-        batch_size = 128,
+        n_steps = n_steps,
+        batch_size = batch_size,
         learning_rate = 1e-4,
-        gamma = 0.99
+        gamma = 0.99,
+        # SB3 hands worker i the seed `seed + i` through env.seed()
+        seed = seed
     )
 
-    model.learn(total_timesteps = total_timesteps)
+    # An interrupted run resumes from its checkpoint; otherwise init_model (a cached policy
+    # for a nearby config) seeds the weights and training fine-tunes it
+    timesteps_done = 0
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        data, params, _ = load_from_zip_file(checkpoint_path, device = model.device)
+        model.set_parameters(params, exact_match = True, device = model.device)
+        timesteps_done = model.num_timesteps = data["num_timesteps"]
+    elif init_model is not None:
+        model.policy.load_state_dict(init_model.policy.state_dict())
+
+    # progress(timesteps_done, total_timesteps) is polled by the backend job queue. PPO only
+    # stops between rollouts, so the total it reports is the budget rounded up to whole ones.
+    callbacks = []
+    if progress:
+        rollout = n_steps * vec_env.num_envs
+        effective_timesteps = max(-(-total_timesteps // rollout) * rollout, timesteps_done)
+        progress(timesteps_done, effective_timesteps)
+        callbacks.append(TrainingProgressCallback(progress, effective_timesteps))
+    if checkpoint_path:
+        callbacks.append(CheckpointEveryCallback(checkpoint_path, checkpoint_every))
+    if total_timesteps > timesteps_done:
+        model.learn(total_timesteps = total_timesteps - timesteps_done, callback = callbacks,
+                    reset_num_timesteps = timesteps_done == 0)
+    if num_workers > 1 and not num_cities:
+        vec_env.close()
     return model
 
-def run_final_demo(model, param_config, n_steps = 60, minimal_logging = False):
-    env = CityEnv(**param_config)
+def run_final_demo(model, param_config, n_steps = 60, minimal_logging = False, eval_rollouts = 0,
+                   seed = None):
+    policy = compile_policy(model)
+    env = CityEnv(seed = seed, **param_config)
     obs = env.reset()
     done = False
     step = 0
@@ -33,7 +126,7 @@ def run_final_demo(model, param_config, n_steps = 60, minimal_logging = False):
 
     print("\n=== Final Demonstration Run ===")
     while not done:
-        action, _states = model.predict(obs, deterministic = True)
+        action, _states = policy.predict(obs, deterministic = True)
         obs, reward, done, info = env.step(action)
         step += 1
         total_rew += reward
@@ -56,3 +149,36 @@ def run_final_demo(model, param_config, n_steps = 60, minimal_logging = False):
         f"Final Demo ended after {step} steps, totalReward = {total_rew:.2f}, "
         f"finalHap = {final_hap:.2f}"
     )
+
+    # One rollout is noisy under shocks, emigration and price moves; summarize many
+    if eval_rollouts > 0:
+        evaluation = evaluate_policy(policy, param_config, eval_rollouts, seed = seed)
+        for name, summary in list(evaluation["final"].items()) + [("reward", evaluation["total_reward"])]:
+            print(f"  {name}: mean = {summary['mean']:.2f}, "
+                  f"p10-p90 = [{summary['p10']:.2f}, {summary['p90']:.2f}] over {eval_rollouts} rollouts")
+        return evaluation
+
+def evaluate_fixed_action(param_config, action, seed = None):
+    # Holds one action for a whole episode. The "steady" household backend fast-forwards
+    # through stretches where no household can leave, so very long horizons stay cheap.
+    env = CityEnv(**{"telemetry": "off", "household_backend": "steady", **param_config})
+    if seed is not None:
+        env.seed(seed)
+    env.reset()
+
+    done = False
+    total_rew = 0.0
+    info = {"avg_happiness": env._get_avg_happiness(), "daily_profits": 0.0}
+    while not done:
+        _, reward, done, info = env.step(action)
+        total_rew += reward
+
+    return {
+        "total_reward": total_rew,
+        "steps": env.current_step,
+        "fast_forward_steps": getattr(env.households, "fast_steps", 0),
+        "final_happiness": info["avg_happiness"],
+        "final_population": len(env.households),
+        "final_budget": env.gov.budget,
+        "final_profit": info["daily_profits"],
+    }
@@ -37,13 +37,16 @@ class Household:
         elif self.happiness > 100:
             self.happiness = 100.0
 
-    def decide_if_leave(self):
+    def decide_if_leave(self, draw = None):
+        # draw: one uniform from the env's Generator
+        if draw is None:
+            draw = random.random()
         if self.happiness < 5:
             return (
-                random.random() < 0.3
+                draw < 0.3
             )
         elif self.happiness < 10:
             return (
-                random.random() < 0.1
+                draw < 0.1
             )
         return False
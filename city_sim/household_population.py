@@ -0,0 +1,159 @@
+import numpy as np
+
+# Happiness multipliers per household mode, mirroring Household.update_happiness
+MODES = ("basic_happiness", "growth", "strict_budget", "dark_lord", "custom")
+LEFTOVER_MULTIPLIERS = np.array([0.06, 0.02, 0.02, 0.02, 0.02])
+INFRA_MULTIPLIERS    = np.array([0.08, 0.03, 0.03, 0.0, 0.03])
+
+
+def mode_code(mode):
+    if mode in MODES:
+        return MODES.index(mode)
+    # unknown modes behave like the generic branch of update_happiness
+    return MODES.index("custom")
+
+
+# Struct-of-arrays household storage: the batched twin of a list of Household
+class HouseholdPopulation:
+
+    FIELDS = ("wage", "happiness", "employed", "cost_of_living", "mode")
+    DTYPES = (np.float64, np.float64, np.bool_, np.float64, np.int8)
+
+    def __init__(self, capacity = 64):
+        self.size = 0
+        self._hap_sum = 0.0
+        self._alloc(max(int(capacity), 1))
+
+    def _alloc(self, capacity):
+        old_size = self.size
+        for name, dtype in zip(self.FIELDS, self.DTYPES):
+            buf = np.zeros(capacity, dtype = dtype)
+            old = getattr(self, "_" + name, None)
+            if old is not None:
+                buf[:old_size] = old[:old_size]
+            setattr(self, "_" + name, buf)
+        self.capacity = capacity
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed > self.capacity:
+            self._alloc(max(needed, 2 * self.capacity))
+
+    def __len__(self):
+        return self.size
+
+    # Views over the live part of each column
+    @property
+    def wage(self):
+        return self._wage[:self.size]
+
+    @property
+    def happiness(self):
+        return self._happiness[:self.size]
+
+    @property
+    def employed(self):
+        return self._employed[:self.size]
+
+    @property
+    def cost_of_living(self):
+        return self._cost_of_living[:self.size]
+
+    @property
+    def mode(self):
+        return self._mode[:self.size]
+
+    def clear(self):
+        self.size = 0
+        self._hap_sum = 0.0
+
+    def extend(self, wages, happiness = 50.0, employed = True, cost_of_living = 8.0,
+               mode = "basic_happiness"):
+        wages = np.asarray(wages, dtype = np.float64).ravel()
+        n = len(wages)
+        self._reserve(n)
+        lo, hi = self.size, self.size + n
+        self._wage[lo:hi] = wages
+        self._happiness[lo:hi] = happiness
+        self._employed[lo:hi] = employed
+        self._cost_of_living[lo:hi] = cost_of_living
+        self._mode[lo:hi] = mode_code(mode) if isinstance(mode, str) else mode
+        self.size = hi
+        if self._hap_sum is not None:
+            self._hap_sum += float(self._happiness[lo:hi].sum())
+
+    def add(self, wage, happiness = 50.0, employed = True, cost_of_living = 8.0,
+            mode = "basic_happiness"):
+        self.extend([wage], happiness, employed, cost_of_living, mode)
+
+    def set_employed(self, slots, employed):
+        self._employed[slots] = employed
+
+    def net_pay(self, tax_rate):
+        return np.where(self.employed, self.wage * (1 - tax_rate), 0.0)
+
+    def leftover_money(self, tax_rate):
+        return np.maximum(0.0, self.net_pay(tax_rate) - self.cost_of_living)
+
+    def total_leftover(self, tax_rate):
+        return float(self.leftover_money(tax_rate).sum())
+
+    def leftover_distribution(self, tax_rate):
+        # (leftover money, household count per entry); None counts means one each
+        return self.leftover_money(tax_rate), None
+
+    def apply_subsidy(self, amount_each):
+        self.happiness[:] += 0.02 * amount_each
+        self._hap_sum = None
+
+    def set_cost_of_living(self, cost_of_living):
+        self.cost_of_living[:] = cost_of_living
+
+    def update_happiness(self, infrastructure, tax_rate):
+        hap = self.happiness
+        mode = self.mode
+        budget_diff = self.net_pay(tax_rate) - self.cost_of_living
+        hap += LEFTOVER_MULTIPLIERS[mode] * budget_diff
+        hap += INFRA_MULTIPLIERS[mode] * min(infrastructure, 60.0)
+        np.clip(hap, 0.0, 100.0, out = hap)
+        self._hap_sum = None
+
+    def add_happiness(self, delta):
+        hap = self.happiness
+        hap += delta
+        np.clip(hap, 0.0, 100.0, out = hap)
+        self._hap_sum = None
+
+    def leave_draws(self, rng):
+        return rng.random(self.size)
+
+    def decide_if_leave(self, draws = None):
+        # draws: one uniform per household, the same ones Household.decide_if_leave would get
+        if draws is None:
+            draws = np.random.random(self.size)
+        hap = self.happiness
+        thresholds = np.where(hap < 5, 0.3, np.where(hap < 10, 0.1, 0.0))
+        return draws < thresholds
+
+    def remove(self, mask):
+        keep = np.flatnonzero(~mask)
+        n = len(keep)
+        if n == self.size:
+            return
+        if self._hap_sum is not None:
+            self._hap_sum -= float(self.happiness[mask].sum())
+        for name in self.FIELDS:
+            buf = getattr(self, "_" + name)
+            buf[:n] = buf[keep]
+        self.size = n
+
+    def happiness_sum(self):
+        # Running total: adjusted on add/remove, recomputed once after a bulk update
+        if self._hap_sum is None:
+            self._hap_sum = float(self.happiness.sum())
+        return self._hap_sum
+
+    def avg_happiness(self):
+        if self.size == 0:
+            return 0.0
+        return self.happiness_sum() / self.size
@@ -0,0 +1,103 @@
+import numpy as np
+
+
+# Index of who holds a job, by household slot: one stack of unemployed slots and one of
+# employed slots. Firms' net headcount change is filled from the top of the unemployed
+# stack and layoffs come off the top of the employed stack (last hired, first let go), so
+# a step costs O(workers moved) rather than a scan of the population. Slots are positions
+# in the env's household list or HouseholdPopulation, and compact() follows them when
+# households leave.
+class LaborMarket:
+
+    def __init__(self, capacity = 64):
+        self._unemployed = np.zeros(max(int(capacity), 1), dtype = np.int64)
+        self._employed = np.zeros_like(self._unemployed)
+        self.num_unemployed = 0
+        self.num_employed = 0
+
+    def __len__(self):
+        return self.num_unemployed + self.num_employed
+
+    def _reserve(self, extra):
+        needed = len(self) + extra
+        if needed > len(self._unemployed):
+            capacity = max(needed, 2 * len(self._unemployed))
+            self._unemployed = np.resize(self._unemployed, capacity)
+            self._employed = np.resize(self._employed, capacity)
+
+    def reset(self, employed):
+        # employed: one flag per slot, in slot order
+        employed = np.asarray(employed, dtype = bool)
+        self.num_unemployed = self.num_employed = 0
+        self._reserve(len(employed))
+        slots = np.arange(len(employed))
+        self._push_unemployed(slots[~employed])
+        self._push_employed(slots[employed])
+
+    def state(self):
+        # Copies of both stacks, bottom first
+        return (self._unemployed[:self.num_unemployed].copy(),
+                self._employed[:self.num_employed].copy())
+
+    def load(self, unemployed, employed):
+        self.num_unemployed = self.num_employed = 0
+        self._reserve(len(unemployed) + len(employed))
+        self._push_unemployed(unemployed)
+        self._push_employed(employed)
+
+    def _push_unemployed(self, slots):
+        n = self.num_unemployed
+        self._unemployed[n:n + len(slots)] = slots
+        self.num_unemployed = n + len(slots)
+
+    def _push_employed(self, slots):
+        n = self.num_employed
+        self._employed[n:n + len(slots)] = slots
+        self.num_employed = n + len(slots)
+
+    def add(self, slot, employed = False):
+        self._reserve(1)
+        if employed:
+            self._push_employed([slot])
+        else:
+            self._push_unemployed([slot])
+
+    def hire(self, count):
+        # Returns the slots that found a job; at most num_unemployed of them
+        count = min(max(int(count), 0), self.num_unemployed)
+        n = self.num_unemployed - count
+        slots = self._unemployed[n:self.num_unemployed][::-1].copy()
+        self.num_unemployed = n
+        self._push_employed(slots)
+        return slots
+
+    def release(self, count):
+        # Returns the slots that lost their job; at most num_employed of them
+        count = min(max(int(count), 0), self.num_employed)
+        n = self.num_employed - count
+        slots = self._employed[n:self.num_employed][::-1].copy()
+        self.num_employed = n
+        self._push_unemployed(slots)
+        return slots
+
+    def match(self, jobs_change):
+        # (hired, released) slots for a net change in firm headcount. Hires beyond the
+        # unemployed pool are filled from outside the city.
+        empty = self._unemployed[:0]
+        if jobs_change > 0:
+            return self.hire(jobs_change), empty
+        if jobs_change < 0:
+            return empty, self.release(-jobs_change)
+        return empty, empty
+
+    def compact(self, keep):
+        # keep: one flag per old slot; survivors are renumbered in order, as list and
+        # HouseholdPopulation compaction do
+        keep = np.asarray(keep, dtype = bool)
+        new_slot = np.cumsum(keep) - 1
+        for name, count in (("_unemployed", "num_unemployed"), ("_employed", "num_employed")):
+            stack = getattr(self, name)
+            slots = stack[:getattr(self, count)]
+            slots = new_slot[slots[keep[slots]]]
+            stack[:len(slots)] = slots
+            setattr(self, count, len(slots))
@@ -33,21 +33,21 @@ class ManufacturerFirm(Firm):
         return goods_produced
 
     def compute_revenue(self):
+        # Sells what produce_final_goods() made this step; pricing never touches inventory
         if self.materials_bought_this_step <= 0:
             return 0.0
-        produced = self.produce_final_goods()
-        return (produced * self.sale_price) * self.profitability_factor
+        return (self.last_produced * self.sale_price) * self.profitability_factor
 
-    def compute_profit(self):
-        revenue = self.compute_revenue()
-        wages = self.compute_wages_paid()
-        return revenue - wages - self.material_cost_this_step
+    def compute_costs(self):
+        return self.material_cost_this_step
 
-    def adjust_employment(self):
-        p = self.compute_profit()
+    def adjust_employment(self, draws = None):
+        if draws is None:
+            draws = (random.random(), random.random())
+        p = self.close_books().profit
         if p > 12.0 and self.num_employees < self.max_capacity:
-            if random.random() < 0.5:
+            if draws[0] < 0.5:
                 self.num_employees += 1
         elif p < -12.0 and self.num_employees > self.min_employees:
-            if random.random() < 0.5:
+            if draws[0] < 0.5:
                 self.num_employees -= 1
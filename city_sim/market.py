@@ -0,0 +1,89 @@
+import numpy as np
+
+# Above this many household x retailer pairs, clear_goods_market's vectorized clearing
+# beats the plain-Python loop of clear_small_market
+SMALL_MARKET = 2048
+
+
+def household_demand(budgets, prices, need, counts = None):
+    # Units households buy at each price when each buys min(need, budget / price).
+    # A household with budget >= need * price buys its full need and the rest spend their
+    # whole budget, so binning budgets between the sorted thresholds need * price gives
+    # every price's demand in O(H log R) without sorting households. Leading axes are
+    # batch axes (one row per city); counts weights each budget, e.g. class sizes or an
+    # alive mask.
+    budgets = np.asarray(budgets, dtype = np.float64)
+    prices = np.maximum(np.asarray(prices, dtype = np.float64), 1e-9)
+    batch = budgets.shape[:-1]
+    b = budgets.reshape(-1, budgets.shape[-1])
+    p = np.broadcast_to(prices, batch + prices.shape[-1:]).reshape(len(b), -1)
+    rows, r = p.shape
+
+    order = np.argsort(p, axis = -1, kind = "stable")
+    sorted_prices = np.take_along_axis(p, order, axis = -1)
+    thresholds = need * sorted_prices
+    # Bin k holds households that afford their full need at the k cheapest prices only
+    bins = np.stack([np.searchsorted(thresholds[i], b[i], side = "right") for i in range(rows)])
+    bins += (r + 1) * np.arange(rows)[:, None]
+    bins = bins.ravel()
+    size = rows * (r + 1)
+    if counts is None:
+        total_w = np.full((rows, 1), float(b.shape[-1]))
+        poor_w = np.bincount(bins, minlength = size)
+        poor_money = np.bincount(bins, b.ravel(), size)
+    else:
+        w = np.broadcast_to(counts, budgets.shape).reshape(b.shape).astype(np.float64)
+        total_w = w.sum(axis = -1, keepdims = True)
+        poor_w = np.bincount(bins, w.ravel(), size)
+        poor_money = np.bincount(bins, (b * w).ravel(), size)
+    # Households in bins 0..k spend their whole budget at the k-th cheapest price
+    poor_w = np.cumsum(poor_w.reshape(rows, r + 1), axis = -1)[:, :r]
+    poor_money = np.cumsum(poor_money.reshape(rows, r + 1), axis = -1)[:, :r]
+
+    sorted_demand = need * (total_w - poor_w) + poor_money / sorted_prices
+    demand = np.empty_like(sorted_demand)
+    np.put_along_axis(demand, order, sorted_demand, axis = -1)
+    return demand.reshape(batch + (r,))
+
+
+def clear_goods_market(budgets, prices, inventories, need, counts = None):
+    # Households buy from the cheapest retailer first until their demand at that price is
+    # met. Demand falls as price rises, so the units cleared through the k-th cheapest
+    # retailer are max over j <= k of min(inventory up to j, demand at price j).
+    # Returns units sold per retailer, in the retailers' own order.
+    prices = np.asarray(prices, dtype = np.float64)
+    inventories = np.asarray(inventories, dtype = np.float64)
+    if prices.shape[-1] == 0 or np.shape(budgets)[-1] == 0 or need <= 0:
+        return np.zeros_like(inventories)
+    if prices.shape == (1,) and np.ndim(budgets) == 1:
+        # One retailer, as in the default city: its sales are min(stock, demand)
+        units = np.minimum(need, np.asarray(budgets, dtype = np.float64) / max(prices[0], 1e-9))
+        demand = units.sum() if counts is None else (counts * units).sum()
+        return np.minimum(inventories, demand)
+
+    order = np.argsort(prices, axis = -1, kind = "stable")
+    sorted_prices = np.take_along_axis(prices, order, axis = -1)
+    stock = np.cumsum(np.take_along_axis(inventories, order, axis = -1), axis = -1)
+    demand = household_demand(budgets, sorted_prices, need, counts)
+    cleared = np.maximum.accumulate(np.minimum(stock, demand), axis = -1)
+
+    sold = np.empty_like(inventories)
+    np.put_along_axis(sold, order, np.diff(cleared, axis = -1, prepend = 0.0), axis = -1)
+    return np.clip(sold, 0.0, inventories)
+
+
+def clear_small_market(budgets, prices, inventories, need):
+    # clear_goods_market for the "objects" backend's few dozen households and handful of
+    # retailers: lists in, list of floats out, no array round trip. O(H * R).
+    sold = [0.0] * len(prices)
+    if not budgets or need <= 0:
+        return sold
+    stock = cleared = 0.0
+    for k in sorted(range(len(prices)), key = prices.__getitem__):
+        price = max(prices[k], 1e-9)
+        demand = sum(min(need, b / price) for b in budgets)
+        stock += inventories[k]
+        reached = max(cleared, min(stock, demand))
+        sold[k] = min(max(reached - cleared, 0.0), inventories[k])
+        cleared = reached
+    return sold
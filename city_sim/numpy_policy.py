@@ -0,0 +1,104 @@
+import numpy as np
+
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0.0),
+}
+
+
+# The actor half of a trained SB3 MlpPolicy as plain NumPy matrices. Only deterministic
+# actions are produced: argmax of the logits for Discrete and MultiDiscrete, the clipped
+# mean for Box, which is what model.predict(obs, deterministic=True) returns. Saved as
+# .npz next to the PPO zip, so loading and running it never imports torch.
+class NumpyPolicy:
+
+    def __init__(self, weights, biases, activation = "Tanh", kind = "Discrete",
+                 nvec = None, low = None, high = None):
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {activation}")
+        if kind not in ("Discrete", "MultiDiscrete", "Box"):
+            raise ValueError(f"Unsupported action space: {kind}")
+        self.weights = [np.asarray(w, dtype = np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype = np.float32) for b in biases]
+        self.activation = activation
+        self.kind = kind
+        self.nvec = None if nvec is None else np.asarray(nvec, dtype = np.int64)
+        self.low = None if low is None else np.asarray(low, dtype = np.float32)
+        self.high = None if high is None else np.asarray(high, dtype = np.float32)
+        self._act = ACTIVATIONS[activation]
+        self._splits = None if nvec is None else np.cumsum(self.nvec)[:-1]
+
+    @classmethod
+    def from_model(cls, model):
+        policy = model.policy
+        extractor = type(policy.features_extractor).__name__
+        if extractor != "FlattenExtractor":
+            raise ValueError(f"Unsupported features extractor: {extractor}")
+
+        weights, biases = [], []
+        activation = "Tanh"
+        for layer in list(policy.mlp_extractor.policy_net) + [policy.action_net]:
+            if hasattr(layer, "weight"):
+                weights.append(layer.weight.detach().cpu().numpy().T)
+                biases.append(layer.bias.detach().cpu().numpy())
+            else:
+                activation = type(layer).__name__
+
+        space = model.action_space
+        kind = type(space).__name__
+        return cls(weights, biases, activation, kind,
+                   nvec = getattr(space, "nvec", None) if kind == "MultiDiscrete" else None,
+                   low = space.low if kind == "Box" else None,
+                   high = space.high if kind == "Box" else None)
+
+    def forward(self, obs):
+        x = np.asarray(obs, dtype = np.float32)
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            x = self._act(x @ w + b)
+        return x @ self.weights[-1] + self.biases[-1]
+
+    def predict(self, obs, deterministic = True):
+        # Same call shape as model.predict; one observation or a (n, obs_dim) batch
+        if not deterministic:
+            raise ValueError("NumpyPolicy only supports deterministic actions")
+        obs = np.asarray(obs, dtype = np.float32)
+        single = obs.ndim == 1
+        out = self.forward(obs.reshape(-1, obs.shape[-1]))
+
+        if self.kind == "Discrete":
+            actions = out.argmax(axis = 1)
+        elif self.kind == "MultiDiscrete":
+            actions = np.stack([part.argmax(axis = 1)
+                                for part in np.split(out, self._splits, axis = 1)], axis = 1)
+        else:
+            actions = np.clip(out, self.low, self.high)
+        return (actions[0] if single else actions), None
+
+    def save(self, f):
+        arrays = {"kind": np.array(self.kind), "activation": np.array(self.activation),
+                  "layers": np.array(len(self.weights))}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f"w{i}"] = w
+            arrays[f"b{i}"] = b
+        for name in ("nvec", "low", "high"):
+            if getattr(self, name) is not None:
+                arrays[name] = getattr(self, name)
+        np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, f):
+        with np.load(f) as data:
+            layers = int(data["layers"])
+            return cls([data[f"w{i}"] for i in range(layers)],
+                       [data[f"b{i}"] for i in range(layers)],
+                       str(data["activation"]), str(data["kind"]),
+                       nvec = data["nvec"] if "nvec" in data else None,
+                       low = data["low"] if "low" in data else None,
+                       high = data["high"] if "high" in data else None)
+
+
+def compile_policy(model):
+    # Accepts either a PPO model or an already exported NumpyPolicy
+    if isinstance(model, NumpyPolicy):
+        return model
+    return NumpyPolicy.from_model(model)
@@ -0,0 +1,123 @@
+import time
+
+import numpy as np
+
+from city_env import CityEnv
+
+CONTROLLERS = ("ppo", "planner")
+
+
+# Receding-horizon government controller: no training, just search. Before every real step
+# the city is snapshotted into a private model env, and candidate (tax, infra, subsidy)
+# choices are each held for `horizon` simulated steps from that state. The last choice and
+# `samples` random ones are scored first, since the levers interact (taxes fund infra and
+# subsidies); the levers are then refined one at a time from the best (coordinate ascent)
+# until `budget` simulated steps are spent, and the best choice is played. Rollouts use the
+# planner's own random streams, common to all candidates of a decision, so the search cannot
+# see the real env's upcoming draws and candidates are compared under the same luck.
+class LookaheadPlanner:
+
+    def __init__(self, param_config, horizon = 15, budget = 600, scenarios = 1, samples = 8,
+                 seed = None):
+        if horizon < 1 or scenarios < 1:
+            raise ValueError("horizon and scenarios must be at least 1")
+        self.model = CityEnv(**{**param_config, "telemetry": "off", "profile": "off"})
+        self.horizon = horizon
+        self.budget = budget
+        self.scenarios = scenarios
+        self.samples = samples
+        self.rng = np.random.default_rng(seed)
+        self.levers = (self.model.tax_rate_values, self.model.infra_fraction_values,
+                       self.model.subsidy_fraction_values)
+        self.choice = (0, 0, 0)
+        self.decisions = 0
+        self.simulated_steps = 0
+        self.plan_seconds = 0.0
+
+    def reset(self):
+        self.choice = (0, 0, 0)
+
+    def encode(self, choice):
+        # Lever indices -> an action in the env's action_mode
+        i, j, k = choice
+        mode = self.model.action_mode
+        if mode == "flat":
+            return (i * len(self.levers[1]) + j) * len(self.levers[2]) + k
+        if mode == "multidiscrete":
+            return np.array(choice)
+        return np.array([self.levers[0][i], self.levers[1][j], self.levers[2][k]], dtype = np.float32)
+
+    def _value(self, snapshot, choice, streams):
+        action = self.encode(choice)
+        total = 0.0
+        for stream in streams:
+            self.model.restore(snapshot)
+            self.model.rng.bit_generator.state = stream
+            for _ in range(self.horizon):
+                _, reward, done, _ = self.model.step(action)
+                total += reward
+                self.simulated_steps += 1
+                if done:
+                    break
+        return total / len(streams)
+
+    def plan(self, env):
+        # Returns the action to play in env's current state
+        start = time.perf_counter()
+        snapshot = env.snapshot()
+        streams = [np.random.default_rng(self.rng.integers(2 ** 63)).bit_generator.state
+                   for _ in range(self.scenarios)]
+        cost = self.horizon * self.scenarios
+        spent = 0
+        values = {}
+        best = self.choice
+        sampled = [tuple(int(self.rng.integers(len(options))) for options in self.levers)
+                   for _ in range(self.samples)]
+        for candidate in [self.choice] + sampled:
+            if candidate in values or (values and spent + cost > self.budget):
+                continue
+            values[candidate] = self._value(snapshot, candidate, streams)
+            spent += cost
+            if values[candidate] > values[best]:
+                best = candidate
+
+        improved = True
+        while improved and spent + cost <= self.budget:
+            improved = False
+            for lever, options in enumerate(self.levers):
+                # Coarse-to-fine over long levers (the 39 tax rates): every stride-th value,
+                # then the values around the best of those
+                stride = max(1, int(len(options) ** 0.5))
+                for fine in (False, True) if stride > 1 else (True,):
+                    if fine:
+                        lo = max(best[lever] - stride + 1, 0)
+                        candidates = range(lo, min(best[lever] + stride, len(options)))
+                    else:
+                        candidates = range(0, len(options), stride)
+                    for option in candidates:
+                        candidate = best[:lever] + (option,) + best[lever + 1:]
+                        if candidate in values:
+                            continue
+                        if spent + cost > self.budget:
+                            break
+                        values[candidate] = self._value(snapshot, candidate, streams)
+                        spent += cost
+                        if values[candidate] > values[best]:
+                            best = candidate
+                            improved = True
+
+        self.choice = best
+        self.decisions += 1
+        self.plan_seconds += time.perf_counter() - start
+        return self.encode(best)
+
+    def stats(self):
+        return {
+            "horizon": self.horizon,
+            "budget": self.budget,
+            "scenarios": self.scenarios,
+            "samples": self.samples,
+            "decisions": self.decisions,
+            "simulated_steps": self.simulated_steps,
+            "mean_decision_ms": 1e3 * self.plan_seconds / self.decisions if self.decisions else 0.0,
+        }
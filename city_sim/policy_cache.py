@@ -0,0 +1,293 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from city_env import CityEnv
+from raw_material_firm import RawMaterialFirm
+from manufacturer_firm import ManufacturerFirm
+from retail_firm import RetailFirm
+from firm import Firm
+from numpy_policy import NumpyPolicy
+
+# Bump when CityEnv dynamics change so stale policies are not served
+CACHE_VERSION = 4
+
+# Constructor arguments that change how the env is computed, not what it computes
+NON_POLICY_KEYS = ("household_backend", "firm_backend", "telemetry", "profile", "seed")
+
+# Settings that fix a policy's input/output shapes or its objective. Warm starts only
+# reuse cached policies that agree on all of them.
+WARM_START_MATCH = ("action_mode", "tax_rate_values", "infra_fraction_values",
+                    "subsidy_fraction_values", "reward_mode", "custom_weights")
+
+FIRM_PARAM_CLASSES = {
+    "raw_firm_params": RawMaterialFirm,
+    "manu_firm_params": ManufacturerFirm,
+    "retail_firm_params": RetailFirm,
+    "generic_firm_params": Firm,
+}
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return _normalize(value.item()) if hasattr(value, "item") else str(value)
+
+
+def canonical_config(param_config):
+    # Resolve every CityEnv and firm default so equivalent configs compare equal
+    env = CityEnv(**param_config)
+    names = [n for n in inspect.signature(CityEnv.__init__).parameters
+             if n != "self" and n not in NON_POLICY_KEYS]
+
+    config = {}
+    for name in names:
+        if name in FIRM_PARAM_CLASSES:
+            firm = FIRM_PARAM_CLASSES[name](**getattr(env, name))
+            config[name] = dict(vars(firm))
+        else:
+            config[name] = getattr(env, name)
+
+    if config["reward_mode"] != "custom":
+        config["custom_weights"] = {}
+    return _normalize(config)
+
+
+def config_key(param_config, total_timesteps, seed=None, warm_start=None):
+    payload = {
+        "version": CACHE_VERSION,
+        "config": canonical_config(param_config),
+        "total_timesteps": int(total_timesteps),
+        "seed": seed,
+    }
+    # Fine-tuned policies get their own entries; fully trained keys are unchanged
+    if warm_start:
+        payload["warm_start"] = float(warm_start)
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _flatten(config, prefix=""):
+    items = {}
+    for name, value in config.items():
+        if isinstance(value, dict):
+            items.update(_flatten(value, prefix + name + "."))
+        else:
+            items[prefix + name] = value
+    return items
+
+
+def config_distance(a, b):
+    # Mean relative difference over the settings of two canonical configs, in [0, 1];
+    # None when they differ in anything listed in WARM_START_MATCH
+    if any(a.get(name) != b.get(name) for name in WARM_START_MATCH):
+        return None
+    a = _flatten({k: v for k, v in a.items() if k not in WARM_START_MATCH})
+    b = _flatten({k: v for k, v in b.items() if k not in WARM_START_MATCH})
+    total = 0.0
+    for name in set(a) | set(b):
+        x, y = a.get(name), b.get(name)
+        if isinstance(x, float) and isinstance(y, float):
+            scale = max(abs(x), abs(y))
+            total += abs(x - y) / scale if scale > 0 else 0.0
+        else:
+            total += float(x != y)
+    return total / max(len(set(a) | set(b)), 1)
+
+
+# Trained PPO policies on disk keyed by config_key(), evicted least-recently-used past
+# max_entries. Recently used models also stay in memory so repeat hits skip loading.
+# Each entry also keeps a NumpyPolicy export, which get_policy serves without torch.
+class PolicyCache:
+
+    def __init__(self, directory, max_entries=64, memory_entries=8):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".zip")
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _policy_path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def checkpoint_path(self, key):
+        # In-progress training for key; removed once the finished model is stored
+        return os.path.join(self.directory, "checkpoints", key + ".zip")
+
+    def nearest(self, config, max_distance=0.1, min_timesteps=0):
+        # (key, distance, total_timesteps) of the closest compatible cached policy to a
+        # canonical config, among those trained for at least min_timesteps
+        best = None
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            try:
+                with open(self._meta_path(key)) as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not os.path.exists(self._path(key)):
+                continue
+            timesteps = int(metadata.get("total_timesteps", 0))
+            if timesteps < min_timesteps:
+                continue
+            distance = config_distance(config, metadata.get("config", {}))
+            if distance is not None and distance <= max_distance and (best is None or distance < best[1]):
+                best = (key, distance, timesteps)
+        return best
+
+    def _remember(self, key, model):
+        self._memory[key] = model
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        from stable_baselines3 import PPO
+
+        path = self._path(key)
+        with self._lock:
+            if not os.path.exists(path):
+                self._memory.pop(key, None)
+                return None
+            os.utime(path)  # mtime doubles as the LRU clock
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        model = PPO.load(path, device="cpu")
+        with self._lock:
+            self._remember(key, model)
+        return model
+
+    def get_policy(self, key):
+        # NumpyPolicy for key; entries saved before the export existed are exported once
+        path = self._path(key)
+        policy_key = key + ".npz"
+        with self._lock:
+            if not os.path.exists(path):
+                self._memory.pop(policy_key, None)
+                return None
+            os.utime(path)
+            if policy_key in self._memory:
+                self._memory.move_to_end(policy_key)
+                return self._memory[policy_key]
+
+        if os.path.exists(self._policy_path(key)):
+            policy = NumpyPolicy.load(self._policy_path(key))
+        else:
+            model = self.get(key)
+            if model is None:
+                return None
+            policy = NumpyPolicy.from_model(model)
+            self._write_policy(key, policy)
+        with self._lock:
+            self._remember(policy_key, policy)
+        return policy
+
+    def _write_policy(self, key, policy):
+        tmp_path = f"{self._policy_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            policy.save(f)
+        os.replace(tmp_path, self._policy_path(key))
+
+    def put(self, key, model, metadata=None):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        model.save(tmp_path)
+        # SB3 appends .zip when the name lacks it
+        if not os.path.exists(tmp_path) and os.path.exists(tmp_path + ".zip"):
+            tmp_path += ".zip"
+        os.replace(tmp_path, path)
+
+        if metadata is not None:
+            meta_tmp = f"{self._meta_path(key)}.{os.getpid()}.tmp"
+            with open(meta_tmp, "w") as f:
+                json.dump(metadata, f, sort_keys=True)
+            os.replace(meta_tmp, self._meta_path(key))
+
+        policy = NumpyPolicy.from_model(model)
+        self._write_policy(key, policy)
+
+        try:
+            os.remove(self.checkpoint_path(key))
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self._remember(key + ".npz", policy)
+            self._remember(key, model)
+            self._evict()
+
+    def _evict(self):
+        entries = [name[:-4] for name in os.listdir(self.directory) if name.endswith(".zip")]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda k: os.path.getmtime(self._path(k)))
+        for key in entries[:len(entries) - self.max_entries]:
+            for path in (self._path(key), self._meta_path(key), self._policy_path(key)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._memory.pop(key, None)
+            self._memory.pop(key + ".npz", None)
+
+
+def get_or_train(cache, param_config, total_timesteps, train_fn, seed=None, compiled=False,
+                 warm_start=None, **train_kwargs):
+    # Returns (model, cache_hit); only trains when no policy exists for this config.
+    # compiled=True returns the NumpyPolicy export instead of the PPO model.
+    # warm_start: on a miss, fine-tune the nearest compatible cached policy for this
+    # fraction of total_timesteps instead of training from scratch. Only policies trained
+    # for at least total_timesteps qualify, so a warm entry is never trained for less
+    # than the budget its key stands for.
+    if cache is None:
+        model = train_fn(param_config, total_timesteps=total_timesteps, seed=seed, **train_kwargs)
+        return (NumpyPolicy.from_model(model) if compiled else model), False
+
+    lookup = cache.get_policy if compiled else cache.get
+    key = config_key(param_config, total_timesteps, seed)
+    model = lookup(key)
+    if model is not None:
+        return model, True
+
+    config = canonical_config(param_config)
+    metadata = {"config": config, "total_timesteps": int(total_timesteps), "seed": seed}
+    nearest = None
+    if warm_start:
+        warm_key = config_key(param_config, total_timesteps, seed, warm_start=warm_start)
+        model = lookup(warm_key)
+        if model is not None:
+            return model, True
+        nearest = cache.nearest(config, min_timesteps=int(total_timesteps))
+
+    init_model = cache.get(nearest[0]) if nearest is not None else None
+    if init_model is not None:
+        key = warm_key
+        train_kwargs["init_model"] = init_model
+        total_timesteps = max(int(total_timesteps * warm_start), 1)
+        metadata["warm_start"] = {"from": nearest[0], "distance": nearest[1],
+                                  "source_timesteps": nearest[2], "timesteps": total_timesteps}
+
+    model = train_fn(param_config, total_timesteps=total_timesteps, seed=seed,
+                     checkpoint_path=cache.checkpoint_path(key), **train_kwargs)
+    cache.put(key, model, metadata=metadata)
+    return (NumpyPolicy.from_model(model) if compiled else model), False
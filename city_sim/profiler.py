@@ -0,0 +1,121 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+PROFILE_LEVELS = ("off", "phases", "full")
+
+# CityEnv.step phases, in the order they run
+PHASES = (
+    "action", "leftover", "raw_fluctuation", "raw_firms", "manu_firms", "retail_firms",
+    "generic_firms", "bankruptcy", "labor", "taxes", "infrastructure_subsidy", "inflation",
+    "infra_decay", "shock", "households", "immigration", "reward", "telemetry", "observation",
+)
+
+# Profiler of the env currently inside step(); agent method wrappers record into it
+_active = None
+_instrumented = False
+
+
+def _timed(key, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.add(key, time.perf_counter() - start)
+    return wrapper
+
+
+def instrument_agents():
+    # Wraps the public methods of every agent class, once per process. Envs that do not
+    # profile at "full" then pay one global lookup per agent method call.
+    global _instrumented
+    if _instrumented:
+        return
+    from firm import Firm
+    from raw_material_firm import RawMaterialFirm
+    from manufacturer_firm import ManufacturerFirm
+    from retail_firm import RetailFirm
+    from firm_tier import FirmTier, RawMaterialTier, ManufacturerTier, RetailTier
+    from household import Household
+    from household_population import HouseholdPopulation
+    from steady_population import SteadyPopulation
+    from government import Government
+
+    for cls in (Firm, RawMaterialFirm, ManufacturerFirm, RetailFirm, FirmTier, RawMaterialTier,
+                ManufacturerTier, RetailTier, Household, HouseholdPopulation, SteadyPopulation,
+                Government):
+        for name, fn in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.isfunction(fn):
+                setattr(cls, name, _timed(f"{cls.__name__}.{name}", fn))
+    _instrumented = True
+
+
+# Cumulative wall time and call counts per step phase and, at "full", per agent method.
+# Method times are inclusive of the methods they call.
+class StepProfiler:
+
+    def __init__(self, level = "phases"):
+        if level not in PROFILE_LEVELS or level == "off":
+            raise ValueError(f"Unknown profile level: {level}")
+        self.level = level
+        if level == "full":
+            instrument_agents()
+        self.reset()
+
+    def reset(self):
+        self.steps = 0
+        self.step_seconds = 0.0
+        self.seconds = {}
+        self.calls = {}
+        self._last = 0.0
+
+    def add(self, key, seconds, calls = 1):
+        self.seconds[key] = self.seconds.get(key, 0.0) + seconds
+        self.calls[key] = self.calls.get(key, 0) + calls
+
+    def lap(self, phase):
+        # Charges the time since the previous lap (or step start) to phase
+        now = time.perf_counter()
+        self.add(phase, now - self._last)
+        self._last = now
+
+    @contextmanager
+    def stepping(self):
+        global _active
+        previous = _active
+        if self.level == "full":
+            _active = self
+        start = self._last = time.perf_counter()
+        try:
+            yield
+        finally:
+            _active = previous
+            self.steps += 1
+            self.step_seconds += time.perf_counter() - start
+
+    def merge(self, other):
+        self.steps += other.steps
+        self.step_seconds += other.step_seconds
+        for key, seconds in other.seconds.items():
+            self.add(key, seconds, other.calls[key])
+
+    def report(self):
+        def entry(key):
+            calls = self.calls[key]
+            return {"calls": calls, "total_s": self.seconds[key],
+                    "mean_us": 1e6 * self.seconds[key] / calls}
+
+        return {
+            "level": self.level,
+            "steps": self.steps,
+            "step_total_s": self.step_seconds,
+            "step_mean_us": 1e6 * self.step_seconds / self.steps if self.steps else 0.0,
+            "phases": {phase: entry(phase) for phase in PHASES if phase in self.calls},
+            "methods": {key: entry(key) for key in sorted(self.calls) if key not in PHASES},
+        }
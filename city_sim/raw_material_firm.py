@@ -23,17 +23,15 @@ class RawMaterialFirm(Firm):
         base_revenue = units * self.material_price
         return base_revenue * self.profitability_factor
 
-    def compute_profit(self):
-        revenue = self.compute_revenue()
-        wages = self.compute_wages_paid()
-        return revenue - wages
-
-    def adjust_employment(self):
-        profit = self.compute_profit()
+    def adjust_employment(self, draws = None):
+        # draws[0] decides whether to hire/fire, draws[1] how many to hire
+        if draws is None:
+            draws = (random.random(), random.random())
+        profit = self.close_books().profit
         if profit > 8.0 and self.num_employees < self.max_capacity:
-            if random.random() < 0.4:
-                delta = 1 if random.random() < 0.7 else 2
+            if draws[0] < 0.4:
+                delta = 1 if draws[1] < 0.7 else 2
                 self.num_employees = min(self.num_employees + delta, self.max_capacity)
         elif profit < -8.0 and self.num_employees > self.min_employees:
-            if random.random() < 0.4:
+            if draws[0] < 0.4:
                 self.num_employees = max(self.min_employees, self.num_employees - 1)
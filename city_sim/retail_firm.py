@@ -36,16 +36,16 @@ class RetailFirm(Firm):
         base_revenue = self.goods_sold_this_step * self.retail_price
         return base_revenue * self.profitability_factor
 
-    def compute_profit(self) -> float:
-        revenue = self.compute_revenue()
-        wages = self.compute_wages_paid()
-        return revenue - wages - self.wholesale_cost_this_step
+    def compute_costs(self) -> float:
+        return self.wholesale_cost_this_step
 
-    def adjust_employment(self):
-        p = self.compute_profit()
+    def adjust_employment(self, draws = None):
+        if draws is None:
+            draws = (random.random(), random.random())
+        p = self.close_books().profit
         if p > 8.0 and self.num_employees < self.max_capacity:
-            if random.random() < 0.4:
+            if draws[0] < 0.4:
                 self.num_employees += 1
         elif p < -8.0 and self.num_employees > self.min_employees:
-            if random.random() < 0.3:
+            if draws[0] < 0.3:
                 self.num_employees -= 1
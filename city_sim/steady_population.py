@@ -0,0 +1,202 @@
+import numpy as np
+
+from household_population import (HouseholdPopulation, LEFTOVER_MULTIPLIERS, INFRA_MULTIPLIERS,
+                                  mode_code)
+
+
+def skip_draws(rng, n):
+    # Leaves rng where rng.random(n) would; small batches are cheaper to just draw
+    bit_generator = rng.bit_generator
+    if (n > 4096 and hasattr(bit_generator, "advance")
+            and not bit_generator.state.get("has_uint32")):
+        bit_generator.advance(n)
+    else:
+        rng.random(n)
+
+
+# HouseholdPopulation that fast-forwards through steady stretches of an episode.
+# Households with the same wage, employment, cost of living, mode and happiness get
+# exactly the same update every step, so while nobody is below the leave threshold the
+# population is held as one entry per such class plus a member count. A step then costs
+# O(classes) instead of O(households), runs the same float operations as the exact path
+# and skips the leave draws. As soon as a household could leave, the columns are rebuilt
+# and stepping is exact again until the population steadies.
+class SteadyPopulation(HouseholdPopulation):
+
+    LEAVE_BELOW = 10.0
+
+    def __init__(self, capacity = 64):
+        super().__init__(capacity)
+        self.lazy = False
+        self.fast_steps = 0
+        self._backoff = 1
+        self._wait = 0
+        self._entered_at = 0
+
+    @property
+    def happiness(self):
+        # Read-only while lazy: the column is refreshed from the classes on every access
+        if self.lazy:
+            self._sync()
+        return self._happiness[:self.size]
+
+    def clear(self):
+        self.lazy = False
+        self.fast_steps = 0
+        self._backoff = 1
+        self._wait = 0
+        super().clear()
+
+    def extend(self, *args, **kwargs):
+        if self.lazy:
+            self._materialize()
+        super().extend(*args, **kwargs)
+
+    def _enter_lazy(self):
+        n = self.size
+        keys = np.stack([self.wage, self.employed, self.cost_of_living, self.mode,
+                         self._happiness[:n]], axis = 1)
+        uniq, inverse = np.unique(keys, axis = 0, return_inverse = True)
+
+        self._cls = np.zeros(self.capacity, dtype = np.int64)
+        self._cls[:n] = inverse.ravel()
+        self._c_count = np.bincount(self._cls[:n], minlength = len(uniq))
+        self._c_wage = uniq[:, 0]
+        self._c_employed = uniq[:, 1].astype(bool)
+        self._c_col = uniq[:, 2]
+        self._c_mode = uniq[:, 3].astype(np.int8)
+        self._c_hap = uniq[:, 4]
+        self.lazy = True
+
+    def _sync(self):
+        self._happiness[:self.size] = self._c_hap[self._cls[:self.size]]
+        self._hap_sum = None
+
+    def _materialize(self):
+        self._sync()
+        self.lazy = False
+
+    def total_leftover(self, tax_rate):
+        if not self.lazy:
+            return super().total_leftover(tax_rate)
+        net = np.where(self._c_employed, self._c_wage * (1 - tax_rate), 0.0)
+        return float((self._c_count * np.maximum(0.0, net - self._c_col)).sum())
+
+    def leftover_distribution(self, tax_rate):
+        if not self.lazy:
+            return super().leftover_distribution(tax_rate)
+        net = np.where(self._c_employed, self._c_wage * (1 - tax_rate), 0.0)
+        return np.maximum(0.0, net - self._c_col), self._c_count
+
+    def apply_subsidy(self, amount_each):
+        if not self.lazy:
+            return super().apply_subsidy(amount_each)
+        self._c_hap += 0.02 * amount_each
+
+    def set_cost_of_living(self, cost_of_living):
+        super().set_cost_of_living(cost_of_living)
+        if self.lazy:
+            self._c_col[:] = cost_of_living
+
+    def update_happiness(self, infrastructure, tax_rate):
+        if not self.lazy:
+            return super().update_happiness(infrastructure, tax_rate)
+        # Same operations as HouseholdPopulation.update_happiness, once per class
+        hap = self._c_hap
+        net_pay = np.where(self._c_employed, self._c_wage * (1 - tax_rate), 0.0)
+        hap += LEFTOVER_MULTIPLIERS[self._c_mode] * (net_pay - self._c_col)
+        hap += INFRA_MULTIPLIERS[self._c_mode] * min(infrastructure, 60.0)
+        np.clip(hap, 0.0, 100.0, out = hap)
+
+    def add_happiness(self, delta):
+        if not self.lazy:
+            return super().add_happiness(delta)
+        hap = self._c_hap
+        hap += delta
+        np.clip(hap, 0.0, 100.0, out = hap)
+
+    def leave_draws(self, rng):
+        # None means nobody can leave this step; the draws are skipped, not generated
+        if not self.lazy and self.size:
+            if self._wait:
+                self._wait -= 1
+            elif self._happiness[:self.size].min() >= self.LEAVE_BELOW:
+                self._enter_lazy()
+                self._entered_at = self.fast_steps
+        if self.lazy:
+            # Classes emptied by set_employed() no longer hold anyone who could leave
+            if self.size == 0 or self._c_hap[self._c_count > 0].min() >= self.LEAVE_BELOW:
+                skip_draws(rng, self.size)
+                self.fast_steps += 1
+                return None
+            self._materialize()
+            # Regrouping costs O(n log n): back off while stretches keep ending quickly
+            if self.fast_steps - self._entered_at < self._backoff:
+                self._backoff = min(2 * self._backoff, 256)
+            else:
+                self._backoff = 1
+            self._wait = self._backoff
+        return rng.random(self.size)
+
+    def decide_if_leave(self, draws = None):
+        if draws is None:
+            return None
+        return super().decide_if_leave(draws)
+
+    def remove(self, mask):
+        if mask is None:
+            return
+        if self.lazy:
+            self._materialize()
+        super().remove(mask)
+
+    def add(self, wage, happiness = 50.0, employed = True, cost_of_living = 8.0,
+            mode = "basic_happiness"):
+        index = self.size
+        code = mode_code(mode) if isinstance(mode, str) else mode
+        HouseholdPopulation.extend(self, [wage], happiness, employed, cost_of_living, code)
+        if not self.lazy:
+            return
+
+        # Store exactly what extend() stored so the class matches the column bit for bit
+        self._assign_class(index, self._happiness[index])
+
+    def _assign_class(self, index, happiness):
+        # Puts slot index in the class of its columns and happiness, creating it if needed
+        wage = self._wage[index]
+        cost_of_living = self._cost_of_living[index]
+        employed = bool(self._employed[index])
+        code = self._mode[index]
+        match = np.flatnonzero((self._c_wage == wage) & (self._c_employed == employed)
+                               & (self._c_col == cost_of_living) & (self._c_mode == code)
+                               & (self._c_hap == happiness))
+        if len(match):
+            c = match[0]
+            self._c_count[c] += 1
+        else:
+            c = len(self._c_hap)
+            self._c_count = np.append(self._c_count, 1)
+            self._c_wage = np.append(self._c_wage, wage)
+            self._c_employed = np.append(self._c_employed, employed)
+            self._c_col = np.append(self._c_col, cost_of_living)
+            self._c_mode = np.append(self._c_mode, np.int8(code))
+            self._c_hap = np.append(self._c_hap, happiness)
+
+        if index >= len(self._cls):
+            self._cls = np.resize(self._cls, self.capacity)
+        self._cls[index] = c
+
+    def set_employed(self, slots, employed):
+        super().set_employed(slots, employed)
+        if not self.lazy:
+            return
+        # Moves each slot to the class with its new status; O(slots x classes)
+        for index in slots:
+            c = self._cls[index]
+            self._c_count[c] -= 1
+            self._assign_class(index, self._c_hap[c])
+
+    def happiness_sum(self):
+        if not self.lazy:
+            return super().happiness_sum()
+        return float((self._c_count * self._c_hap).sum())
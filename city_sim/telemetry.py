@@ -0,0 +1,192 @@
+import numpy as np
+
+TELEMETRY_LEVELS = ("off", "aggregate", "full")
+
+TIERS = ("raw", "manu", "retail", "generic")
+
+COLUMNS = (
+    "chosen_tax", "chosen_infra", "chosen_subsidy",
+    "raw_profit_sum", "manu_profit_sum", "retail_profit_sum", "generic_profit_sum",
+    "raw_count", "manu_count", "retail_count", "generic_count",
+    "bankrupt_count", "shock_triggered", "daily_profits_sum",
+    "gov_budget", "infrastructure", "avg_happiness", "population", "reward",
+)
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+INT_COLUMNS = ("raw_count", "manu_count", "retail_count", "generic_count",
+               "bankrupt_count", "population")
+
+# Rows of a saved "aggregate" table, one per statistic kept over the episode
+SUMMARY_STATS = ("sum", "mean", "min", "max")
+
+
+# Per-step metrics in preallocated columns instead of one dict per step.
+#   off:       record() is a no-op (PPO training)
+#   aggregate: only episode totals / minima / maxima are kept
+#   full:      one row per step plus every firm's profit, enough to rebuild debug_step_data
+class StepTelemetry:
+
+    def __init__(self, level = "full", capacity = 64):
+        if level not in TELEMETRY_LEVELS:
+            raise ValueError(f"Unknown telemetry level: {level}")
+        self.level = level
+        self.enabled = level != "off"
+        self.full = level == "full"
+
+        n = len(COLUMNS)
+        self._row = np.zeros(n)
+        self._rows = np.zeros((max(capacity, 1), n)) if self.full else None
+        self._firm_profits = np.zeros(max(capacity, 1) * 4) if self.full else None
+        # offsets[step, tier] .. offsets[step, tier + 1] slices _firm_profits
+        self._offsets = np.zeros((max(capacity, 1), len(TIERS) + 1), dtype = np.int64) if self.full else None
+        self.reset()
+
+    def reset(self):
+        self.num_steps = 0
+        self._num_firm_profits = 0
+        self._sums = np.zeros(len(COLUMNS))
+        self._mins = np.full(len(COLUMNS), np.inf)
+        self._maxs = np.full(len(COLUMNS), -np.inf)
+
+    def _grow(self):
+        rows = np.zeros((2 * len(self._rows), len(COLUMNS)))
+        rows[:len(self._rows)] = self._rows
+        self._rows = rows
+        offsets = np.zeros((2 * len(self._offsets), len(TIERS) + 1), dtype = np.int64)
+        offsets[:len(self._offsets)] = self._offsets
+        self._offsets = offsets
+
+    def _store_firm_profits(self, step, firm_profits):
+        offsets = self._offsets[step]
+        pos = self._num_firm_profits
+        offsets[0] = pos
+        for t, profits in enumerate(firm_profits):
+            n = len(profits)
+            if pos + n > len(self._firm_profits):
+                grown = np.zeros(max(2 * len(self._firm_profits), pos + n))
+                grown[:pos] = self._firm_profits[:pos]
+                self._firm_profits = grown
+            self._firm_profits[pos:pos + n] = profits
+            pos += n
+            offsets[t + 1] = pos
+        self._num_firm_profits = pos
+
+    def record(self, values, firm_profits = None):
+        # values follow COLUMNS order; firm_profits is one profit sequence per tier (full only)
+        if not self.enabled:
+            return
+        row = self._row
+        row[:] = values
+        np.add(self._sums, row, out = self._sums)
+        np.minimum(self._mins, row, out = self._mins)
+        np.maximum(self._maxs, row, out = self._maxs)
+
+        if self.full:
+            step = self.num_steps
+            if step >= len(self._rows):
+                self._grow()
+            self._rows[step] = row
+            if firm_profits is not None:
+                self._store_firm_profits(step, firm_profits)
+            else:
+                self._offsets[step] = self._num_firm_profits
+        self.num_steps += 1
+
+    def columns(self):
+        if not self.full:
+            return {}
+        data = {}
+        for name, i in COLUMN_INDEX.items():
+            col = self._rows[:self.num_steps, i]
+            data[name] = col.astype(np.int64) if name in INT_COLUMNS else col
+        return data
+
+    def summary(self):
+        if not self.enabled or self.num_steps == 0:
+            return {"steps": self.num_steps}
+        out = {"steps": self.num_steps}
+        for name, i in COLUMN_INDEX.items():
+            out[name] = {
+                "sum": float(self._sums[i]),
+                "mean": float(self._sums[i] / self.num_steps),
+                "min": float(self._mins[i]),
+                "max": float(self._maxs[i]),
+            }
+        return out
+
+    def firm_profits(self, step, tier):
+        t = TIERS.index(tier)
+        lo, hi = self._offsets[step, t], self._offsets[step, t + 1]
+        return self._firm_profits[lo:hi]
+
+    def step_record(self, step):
+        # One entry of the legacy debug_step_data list
+        if not self.full:
+            return None
+        if step < 0:
+            step += self.num_steps
+        row = self._rows[step]
+        c = COLUMN_INDEX
+        return {
+            "raw_profits": self.firm_profits(step, "raw").tolist(),
+            "manu_profits": self.firm_profits(step, "manu").tolist(),
+            "retail_profits": self.firm_profits(step, "retail").tolist(),
+            "generic_profits": self.firm_profits(step, "generic").tolist(),
+            "chosen_tax": float(row[c["chosen_tax"]]),
+            "chosen_infra": float(row[c["chosen_infra"]]),
+            "chosen_subsidy": float(row[c["chosen_subsidy"]]),
+            "bankrupt_count": int(row[c["bankrupt_count"]]),
+            "shock_triggered": bool(row[c["shock_triggered"]]),
+            "daily_profits_sum": float(row[c["daily_profits_sum"]]),
+            "gov_budget": float(row[c["gov_budget"]]),
+            "infrastructure": float(row[c["infrastructure"]]),
+            "avg_happiness": float(row[c["avg_happiness"]]),
+            "population": int(row[c["population"]]),
+            "reward": float(row[c["reward"]]),
+        }
+
+    def to_debug_steps(self):
+        if not self.full:
+            return []
+        return [self.step_record(step) for step in range(self.num_steps)]
+
+    def summary_columns(self):
+        # summary() as a table: a "stat" column plus one column per metric
+        summary = self.summary()
+        data = {"stat": list(SUMMARY_STATS)}
+        for name in COLUMNS:
+            data[name] = np.array([summary[name][stat] if name in summary else np.nan
+                                   for stat in SUMMARY_STATS])
+        return data
+
+    def _table(self):
+        # What every export holds: per-step rows when full, the SUMMARY_STATS rows at
+        # "aggregate"; "off" has recorded nothing
+        if not self.enabled:
+            raise ValueError("Telemetry level 'off' records nothing to save")
+        return self.columns() if self.full else self.summary_columns()
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self._table())
+
+    def save(self, path):
+        # .npz keeps per-firm profits too; .parquet / .csv hold the table alone
+        table = self._table()
+        if path.endswith(".parquet"):
+            self.to_dataframe().to_parquet(path)
+        elif path.endswith(".csv"):
+            names = list(table)
+            rows = np.column_stack([np.asarray(table[name], dtype = object) for name in names])
+            np.savetxt(path, rows, fmt = "%s", delimiter = ",", header = ",".join(names),
+                       comments = "")
+        else:
+            n = self.num_steps if self.full else 0
+            np.savez_compressed(
+                path,
+                level = self.level,
+                **table,
+                firm_profits = self._firm_profits[:self._num_firm_profits] if self.full else np.zeros(0),
+                firm_profit_offsets = self._offsets[:n] if self.full else np.zeros((0, len(TIERS) + 1)),
+                summary_sums = self._sums,
+            )
@@ -0,0 +1,463 @@
+import time
+import numpy as np
+from gymnasium import spaces
+
+from city_env import CityEnv
+from market import clear_goods_market
+from household_population import LEFTOVER_MULTIPLIERS, INFRA_MULTIPLIERS, mode_code
+from raw_material_firm import RawMaterialFirm
+from manufacturer_firm import ManufacturerFirm
+from retail_firm import RetailFirm
+from firm import Firm
+
+
+# N independent cities stepped together: every household, firm tier and government
+# lives in (num_cities, slots) arrays, so one step_wait() advances all of them with a
+# fixed number of NumPy operations. Cities reaching episode_length auto-reset in place.
+# NumPy only, so evaluation can batch rollouts without importing stable-baselines3;
+# VectorCityEnv wraps it as an SB3 VecEnv for training.
+class VectorCities:
+
+    def __init__(self, param_config = None, num_cities = 8, seed = None):
+        self.param_config = dict(param_config or {})
+        self.num_cities = num_cities
+        self.render_mode = None
+
+        # Resolve defaults and the action table exactly as CityEnv does
+        self.template = CityEnv(**self.param_config)
+        t = self.template
+        self.action_mode = t.action_mode
+        self.actions = np.array(t.actions, dtype = np.float64) if t.actions is not None else None
+        self.lever_values = [np.array(t.tax_rate_values, dtype = np.float64),
+                             np.array(t.infra_fraction_values, dtype = np.float64),
+                             np.array(t.subsidy_fraction_values, dtype = np.float64)]
+        self.episode_length = t.episode_length
+        self.num_households = t.num_households
+        self.reward_mode = t.reward_mode
+        self.custom_weights = t.custom_weights
+
+        self.raw_params = RawMaterialFirm(**t.raw_firm_params).__dict__
+        self.manu_params = ManufacturerFirm(**t.manu_firm_params).__dict__
+        self.retail_params = RetailFirm(**t.retail_firm_params).__dict__
+        self.generic_params = Firm(**t.generic_firm_params).__dict__
+
+        code = mode_code(self.reward_mode)
+        self.leftover_multiplier = LEFTOVER_MULTIPLIERS[code]
+        self.infra_multiplier = INFRA_MULTIPLIERS[code]
+        if self.reward_mode == "dark_lord":
+            self.imm_chance = 0.0
+        elif self.reward_mode == "growth":
+            self.imm_chance = 0.5
+        else:
+            self.imm_chance = 0.3
+
+        # At most one immigrant arrives per step, so this many slots never overflow
+        self.household_slots = self.num_households + self.episode_length
+
+        n, h = num_cities, self.household_slots
+        self.hh_wage = np.zeros((n, h))
+        self.hh_happiness = np.zeros((n, h))
+        self.hh_employed = np.zeros((n, h), dtype = bool)
+        self.hh_alive = np.zeros((n, h), dtype = bool)
+        self.cost_of_living = np.zeros(n)
+
+        self.raw = self._tier_arrays(t.num_raw_firms,
+                                     ("production_factor", "material_price"))
+        self.manu = self._tier_arrays(t.num_manu_firms,
+                                      ("inventory", "materials_bought", "material_cost_this_step"))
+        self.retail = self._tier_arrays(t.num_retail_firms, ("inventory", "goods_sold"))
+        self.generic = self._tier_arrays(t.num_generic_firms, ())
+
+        self.jobs = np.zeros(n)
+        self.budget = np.zeros(n)
+        self.infrastructure = np.zeros(n)
+        self.tax_rate = np.zeros(n)
+        self.current_step = np.zeros(n, dtype = np.int64)
+        self.cumulative_profit = np.zeros(n)
+        self.episode_return = np.zeros(n)
+        self.episode_start = np.zeros(n)
+
+        self.rng = np.random.default_rng(seed)
+        self._actions = None
+
+        self.num_envs = num_cities
+        self.observation_space = spaces.Box(low = -9999, high = 9999, shape = (4,), dtype = np.float32)
+        if self.action_mode == "flat":
+            self.action_space = spaces.Discrete(len(self.actions))
+        elif self.action_mode == "multidiscrete":
+            self.action_space = spaces.MultiDiscrete([len(v) for v in self.lever_values])
+        else:
+            self.action_space = spaces.Box(low = t.action_space.low, high = t.action_space.high,
+                                           dtype = np.float32)
+
+    def _tier_arrays(self, num_firms, extra_columns):
+        n = self.num_cities
+        tier = {
+            "alive": np.zeros((n, num_firms), dtype = bool),
+            "num_employees": np.zeros((n, num_firms)),
+            "capital": np.zeros((n, num_firms)),
+        }
+        for col in extra_columns:
+            tier[col] = np.zeros((n, num_firms))
+        return tier
+
+    def _reset_cities(self, idx):
+        t = self.template
+        k = len(idx)
+        nh = self.num_households
+
+        self.hh_alive[idx] = False
+        self.hh_alive[idx, :nh] = True
+        self.hh_wage[idx, :nh] = self.rng.integers(
+            t.household_wage_min, t.household_wage_max + 1, size = (k, nh))
+        self.hh_happiness[idx] = 50.0
+        self.hh_employed[idx] = True
+        self.cost_of_living[idx] = t.household_cost_of_living
+
+        starting_capital = 100.0
+        for tier, params in ((self.raw, self.raw_params), (self.manu, self.manu_params),
+                             (self.retail, self.retail_params), (self.generic, self.generic_params)):
+            tier["alive"][idx] = True
+            tier["num_employees"][idx] = params["num_employees"]
+            tier["capital"][idx] = starting_capital
+        self.raw["production_factor"][idx] = self.raw_params["production_factor"]
+        self.raw["material_price"][idx] = self.raw_params["material_price"]
+        for col in ("inventory", "materials_bought", "material_cost_this_step"):
+            self.manu[col][idx] = 0.0
+        self.retail["inventory"][idx] = 0.0
+        self.retail["goods_sold"][idx] = 0.0
+        self.jobs[idx] = self._count_jobs()[idx]
+
+        self.budget[idx] = 0.0
+        self.infrastructure[idx] = 0.0
+        self.tax_rate[idx] = 0.0
+        self.current_step[idx] = 0
+        self.cumulative_profit[idx] = 0.0
+        self.episode_return[idx] = 0.0
+        self.episode_start[idx] = time.time()
+
+    def _count_jobs(self):
+        return sum((tier["num_employees"] * tier["alive"]).sum(axis = 1)
+                   for tier in (self.raw, self.manu, self.retail, self.generic))
+
+    def _match_labor(self, jobs_change):
+        # Vector twin of LaborMarket: hires fill the lowest unemployed slots and layoffs
+        # take the highest employed ones; returns the unemployed count per city
+        idle = self.hh_alive & ~self.hh_employed
+        hire = idle & (np.cumsum(idle, axis = 1) <= np.maximum(jobs_change, 0)[:, None])
+        working = self.hh_alive & self.hh_employed
+        from_top = np.cumsum(working[:, ::-1], axis = 1)[:, ::-1]
+        release = working & (from_top <= np.maximum(-jobs_change, 0)[:, None])
+        self.hh_employed = (self.hh_employed | hire) & ~release
+        return idle.sum(axis = 1) - hire.sum(axis = 1) + release.sum(axis = 1)
+
+    def _population(self):
+        return self.hh_alive.sum(axis = 1)
+
+    def _avg_happiness(self, population):
+        total = (self.hh_happiness * self.hh_alive).sum(axis = 1)
+        return np.where(population > 0, total / np.maximum(population, 1), 0.0)
+
+    def _observations(self):
+        pop = self._population()
+        hap = self._avg_happiness(pop)
+        return np.stack([self.budget / 200.0, self.infrastructure / 50.0,
+                         hap / 100.0, pop / 200.0], axis = 1).astype(np.float32)
+
+    @staticmethod
+    def _adjust_employment(tier, profit, draws, hire_above, fire_below, hire_prob, fire_prob,
+                           min_employees, max_capacity):
+        emp = tier["num_employees"]
+        alive = tier["alive"]
+        hire = alive & (profit > hire_above) & (emp < max_capacity) & (draws < hire_prob)
+        fire = alive & (profit < fire_below) & (emp > min_employees) & (draws < fire_prob)
+        return hire, fire
+
+    def _settle(self, tier, profit, wages):
+        alive = tier["alive"]
+        tier["capital"] += np.where(alive, profit, 0.0)
+        bankrupt = alive & (tier["capital"] < -300)
+        tier["alive"] = alive & ~bankrupt
+        return ((wages * alive).sum(axis = 1), (profit * alive).sum(axis = 1),
+                bankrupt.sum(axis = 1))
+
+    def _step_raw(self):
+        raw, p = self.raw, self.raw_params
+        shape = raw["alive"].shape
+
+        fluct = self.rng.uniform(0.99, 1.01, size = shape)
+        raw["material_price"] = np.clip(raw["material_price"] * fluct, 0.5, 20.0)
+
+        total_raw = (raw["num_employees"] * raw["production_factor"] * raw["alive"]).sum(axis = 1)
+
+        # Books are closed once, before hiring; headcount changes are paid from next step
+        emp = raw["num_employees"]
+        wages = emp * p["base_wage"]
+        revenue = emp * raw["production_factor"] * raw["material_price"] * p["profitability_factor"]
+        profit = revenue - wages
+
+        draws = self.rng.random(shape + (2,))
+        hire, fire = self._adjust_employment(raw, profit, draws[..., 0], 8.0, -8.0, 0.4, 0.4,
+                                             p["min_employees"], p["max_capacity"])
+        delta = np.where(draws[..., 1] < 0.7, 1, 2)
+        emp = np.where(hire, np.minimum(emp + delta, p["max_capacity"]), emp)
+        emp = np.where(fire, np.maximum(p["min_employees"], emp - 1), emp)
+        raw["num_employees"] = emp
+
+        return total_raw, self._settle(raw, profit, wages)
+
+    def _step_manu(self, total_raw):
+        manu, p = self.manu, self.manu_params
+        alive = manu["alive"]
+
+        count = alive.sum(axis = 1)
+        buying = (count > 0) & (total_raw > 0)
+        share = np.where(buying, total_raw / np.maximum(count, 1), 0.0)[:, None]
+        buyer = alive & buying[:, None]
+        manu["materials_bought"] = np.where(buyer, share, manu["materials_bought"])
+        manu["material_cost_this_step"] = np.where(
+            buyer, share * p["material_cost"], manu["material_cost_this_step"])
+        manu["inventory"] = np.where(buyer, manu["inventory"] + share, manu["inventory"])
+
+        # Goods are produced once per step, then the books are closed before hiring
+        producing = alive & (manu["materials_bought"] > 0)
+        produced = np.where(producing, np.minimum(manu["inventory"], manu["num_employees"]), 0.0)
+        manu["inventory"] = manu["inventory"] - produced
+        wages = manu["num_employees"] * p["base_wage"]
+        revenue = produced * p["sale_price"] * p["profitability_factor"]
+        profit = revenue - wages - manu["material_cost_this_step"]
+
+        draws = self.rng.random(alive.shape)
+        hire, fire = self._adjust_employment(manu, profit, draws, 12.0, -12.0, 0.5, 0.5,
+                                             p["min_employees"], p["max_capacity"])
+        manu["num_employees"] = manu["num_employees"] + hire - fire
+
+        return produced.sum(axis = 1), self._settle(manu, profit, wages)
+
+    def _step_retail(self, total_goods, goods_budgets):
+        retail, p = self.retail, self.retail_params
+        alive = retail["alive"]
+
+        # Final goods split evenly across live retailers, then sold cheapest first
+        count = alive.sum(axis = 1)
+        share = np.where(count > 0, total_goods / np.maximum(count, 1), 0.0)[:, None]
+        bought = np.where(alive, share, 0.0)
+        retail["inventory"] = retail["inventory"] + bought
+        prices = np.full(alive.shape, float(p["retail_price"]))
+        sold = clear_goods_market(goods_budgets, prices, np.where(alive, retail["inventory"], 0.0),
+                                  self.template.essential_goods_demand, self.hh_alive)
+        retail["inventory"] = retail["inventory"] - sold
+        retail["goods_sold"] = sold
+
+        wages = retail["num_employees"] * p["base_wage"]
+        profit = (sold * p["retail_price"] * p["profitability_factor"] - wages
+                  - bought * p["wholesale_price"])
+
+        draws = self.rng.random(retail["alive"].shape)
+        hire, fire = self._adjust_employment(retail, profit, draws, 8.0, -8.0, 0.4, 0.3,
+                                             p["min_employees"], p["max_capacity"])
+        retail["num_employees"] = retail["num_employees"] + hire - fire
+
+        return sold.sum(axis = 1), self._settle(retail, profit, wages)
+
+    def _step_generic(self):
+        generic, p = self.generic, self.generic_params
+
+        emp = generic["num_employees"]
+        wages = p["base_wage"] * emp
+        profit = p["profitability_factor"] * emp * 20.0 - wages
+
+        draws = self.rng.random(generic["alive"].shape)
+        hire, fire = self._adjust_employment(generic, profit, draws, 10.0, 0.0, 0.5, 0.5,
+                                             0, p["max_capacity"])
+        generic["num_employees"] = emp + hire - fire
+
+        return self._settle(generic, profit, wages)
+
+    def _compute_rewards(self, avg_hap, budget, population, total_profits, total_wages):
+        profit_penalty = 0.05 * np.maximum(0, -total_profits)
+        deficit = np.where(budget < 0, np.abs(budget), 0.0)
+
+        if self.reward_mode == "basic_happiness":
+            return 2.0 * avg_hap - 0.05 * deficit - profit_penalty
+
+        elif self.reward_mode == "growth":
+            gdp = total_wages + total_profits
+            return (0.3 * avg_hap + 2.0 * population + 0.03 * gdp
+                    - 0.05 * deficit - profit_penalty)
+
+        elif self.reward_mode == "strict_budget":
+            rew = 0.8 * avg_hap
+            rew = rew - 0.3 * deficit ** 1.1
+            rew = rew + np.where(budget >= 0, 0.20 * np.maximum(budget, 0.0) ** 0.5, 0.0)
+            return rew - profit_penalty
+
+        elif self.reward_mode == "dark_lord":
+            return (-5.0 * avg_hap + 0.3 * deficit + 0.1 * population
+                    + 0.2 * np.maximum(0, -total_profits))
+
+        elif self.reward_mode == "custom" and self.custom_weights:
+            w = self.custom_weights
+            w_def = w.get("deficit", 0.0)
+            rew = (w.get("hap", 1.0) * avg_hap
+                   + w.get("pop", 0.0) * population
+                   + w.get("infra", 0.0) * self.infrastructure
+                   + w.get("profit", 0.0) * total_profits)
+            if w_def > 0:
+                rew = rew - w_def * deficit
+            return rew - profit_penalty
+
+        else:
+            return avg_hap - profit_penalty
+
+    def reset(self):
+        self._reset_cities(np.arange(self.num_cities))
+        return self._observations()
+
+    def seed(self, seed = None):
+        self.rng = np.random.default_rng(seed)
+        return [seed for _ in range(self.num_cities)]
+
+    def _decode_actions(self, actions):
+        # (num_cities, 3) array of tax rate, infra fraction and subsidy fraction
+        n = self.num_cities
+        if self.action_mode == "flat":
+            return self.actions[np.asarray(actions, dtype = np.int64).reshape(n)]
+        if self.action_mode == "multidiscrete":
+            idx = np.asarray(actions, dtype = np.int64).reshape(n, 3)
+            return np.stack([values[idx[:, i]] for i, values in enumerate(self.lever_values)], axis = 1)
+        space = self.action_space
+        return np.clip(np.asarray(actions, dtype = np.float64).reshape(n, 3), space.low, space.high)
+
+    def step_async(self, actions):
+        self._actions = self._decode_actions(actions)
+
+    def step_wait(self):
+        t = self.template
+        n = self.num_cities
+        chosen = self._actions
+        tax, infra_fraction, subsidy_fraction = chosen[:, 0], chosen[:, 1], chosen[:, 2]
+        self.tax_rate = tax
+
+        # leftover/spend, as in CityEnv: households budget part of it for goods
+        start_population = self._population()
+        leftover = np.where(self.hh_employed, self.hh_wage * (1 - tax[:, None]), 0.0)
+        leftover = np.maximum(0.0, leftover - self.cost_of_living[:, None])
+        total_leftover = (leftover * self.hh_alive).sum(axis = 1)
+
+        total_raw, (w_raw, p_raw, b_raw) = self._step_raw()
+        total_goods, (w_manu, p_manu, b_manu) = self._step_manu(total_raw)
+        goods_sold, (w_ret, p_ret, b_ret) = self._step_retail(total_goods,
+                                                              t.demand_sensitivity * leftover)
+        w_gen, p_gen, b_gen = self._step_generic()
+        total_wages = w_raw + w_manu + w_ret + w_gen
+        total_profits = p_raw + p_manu + p_ret + p_gen
+        bankrupt_count = b_raw + b_manu + b_ret + b_gen
+
+        # Labor market: net headcount change moves households in or out of work
+        jobs = self._count_jobs()
+        unemployed = self._match_labor(np.round(jobs - self.jobs))
+        self.jobs = jobs
+
+        # Government
+        self.budget += tax * total_wages + tax * total_profits
+
+        invest = (self.budget > 0) & (infra_fraction > 0)
+        invest_amt = np.where(invest, infra_fraction * self.budget, 0.0)
+        self.budget -= invest_amt
+        self.infrastructure += 0.07 * invest_amt
+
+        population = self._population()
+        subsidise = (subsidy_fraction > 0) & (self.budget > 0)
+        total_subsidy = np.where(subsidise, subsidy_fraction * self.budget, 0.0)
+        self.budget -= total_subsidy
+        portion = total_subsidy / (population + 1e-6)
+        self.hh_happiness += np.where(self.hh_alive, 0.02 * portion[:, None], 0.0)
+
+        if t.inflation_rate > 0:
+            self.cost_of_living *= (1 + t.inflation_rate)
+
+        if t.infra_decay_rate > 0:
+            self.infrastructure *= (1 - t.infra_decay_rate)
+            self.infrastructure = np.maximum(self.infrastructure, 0.0)
+
+        shock = self.rng.random(n) < t.shock_probability
+        if t.shock_type == "raw_cut" and shock.any():
+            pf = self.raw["production_factor"]
+            self.raw["production_factor"] = np.where(
+                shock[:, None], np.maximum(pf * 0.5, 0.5), pf)
+
+        net_pay = np.where(self.hh_employed, self.hh_wage * (1 - tax[:, None]), 0.0)
+        budget_diff = net_pay - self.cost_of_living[:, None]
+
+        goods_per_household = goods_sold / np.maximum(start_population, 1)
+        shortfall_fraction = 1.0 - np.minimum(1.0, goods_per_household / (t.essential_goods_demand + 1e-6))
+        shortfall_penalty = (t.shortfall_base_penalty * shortfall_fraction)[:, None]
+
+        # Households
+        hap = self.hh_happiness
+        hap += self.leftover_multiplier * budget_diff
+        hap += self.infra_multiplier * np.minimum(self.infrastructure, 60.0)[:, None]
+        np.clip(hap, 0.0, 100.0, out = hap)
+        hap += shortfall_penalty
+        np.clip(hap, 0.0, 100.0, out = hap)
+
+        leave_draws = self.rng.random(hap.shape)
+        leave = self.hh_alive & (((hap < 5) & (leave_draws < 0.3))
+                                 | ((hap >= 5) & (hap < 10) & (leave_draws < 0.1)))
+        self.hh_alive &= ~leave
+
+        population = self._population()
+        avg_hap = self._avg_happiness(population)
+
+        # Immigration
+        arrive = (avg_hap > 50) & (self.rng.random(n) < self.imm_chance)
+        if arrive.any():
+            rows = np.flatnonzero(arrive)
+            slots = np.argmax(~self.hh_alive[rows], axis = 1)
+            self.hh_alive[rows, slots] = True
+            self.hh_wage[rows, slots] = self.rng.integers(
+                t.household_wage_min, t.household_wage_max + 1, size = len(rows))
+            self.hh_happiness[rows, slots] = 50.0
+            self.hh_employed[rows, slots] = False
+            population = population + arrive
+
+        self.current_step += 1
+        dones = self.current_step >= self.episode_length
+
+        self.cumulative_profit += total_profits
+        rewards = self._compute_rewards(avg_hap, self.budget, population,
+                                        total_profits, total_wages)
+        self.episode_return += rewards
+
+        obs = self._observations()
+        infos = [
+            {
+                "avg_happiness": avg_hap[i],
+                "population": int(population[i]),
+                "budget": self.budget[i],
+                "daily_profits": total_profits[i],
+                "cumulative_profits": self.cumulative_profit[i],
+                "leftover_spend": total_leftover[i],
+                "goods_sold": goods_sold[i],
+                "unemployed": int(unemployed[i]),
+                "bankrupt_count": int(bankrupt_count[i]),
+            }
+            for i in range(n)
+        ]
+
+        if dones.any():
+            finished = np.flatnonzero(dones)
+            now = time.time()
+            for i in finished:
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = False
+                infos[i]["episode"] = {
+                    "r": float(self.episode_return[i]),
+                    "l": int(self.current_step[i]),
+                    "t": round(now - self.episode_start[i], 6),
+                }
+            self._reset_cities(finished)
+            obs[finished] = self._observations()[finished]
+
+        return obs, rewards.astype(np.float32), dones, infos
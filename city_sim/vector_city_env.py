@@ -0,0 +1,35 @@
+from stable_baselines3.common.vec_env import VecEnv
+
+from vector_cities import VectorCities
+
+
+# VectorCities as a stable-baselines3 VecEnv, so PPO can train on all cities at once
+class VectorCityEnv(VectorCities, VecEnv):
+
+    def __init__(self, param_config = None, num_cities = 8, seed = None):
+        VectorCities.__init__(self, param_config, num_cities = num_cities, seed = seed)
+        VecEnv.__init__(self, num_cities, self.observation_space, self.action_space)
+
+    def close(self):
+        pass
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
+
+    def get_attr(self, attr_name, indices = None):
+        value = getattr(self, attr_name)
+        return [value for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices = None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices = None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices = None):
+        return [False for _ in self._indices(indices)]